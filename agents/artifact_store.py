@@ -0,0 +1,169 @@
+# agents/artifact_store.py
+
+import atexit
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+ARTIFACT_STORE_PATH = os.getenv("ARTIFACT_STORE_PATH", os.path.join(".data", "artifacts.sqlite3"))
+DEFAULT_SESSION = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    idea_key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    idea TEXT NOT NULL,
+    content TEXT NOT NULL,
+    meta TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    UNIQUE (session_id, idea_key, kind, version)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_lookup
+    ON artifacts (session_id, idea_key, kind, version DESC);
+"""
+
+
+def idea_key(idea):
+    """Stable key for an idea: case/whitespace/markdown-insensitive."""
+    return re.sub(r"\s+", " ", re.sub(r"[*_`]", "", str(idea))).strip().lower()
+
+
+# --------------------------------
+# 🗃️ ARTIFACT STORE
+# --------------------------------
+class ArtifactStore:
+    """
+    Versioned artifacts (business models, …) keyed by session and idea,
+    in SQLite WAL mode so readers never block the writer.
+
+    put() only enqueues: a background thread does the INSERT, keeping disk
+    I/O off the request path. Pending writes are visible to latest()
+    immediately, so a session always reads its own writes.
+    """
+
+    def __init__(self, path=ARTIFACT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._pending = {}  # (session_id, idea_key, kind) -> list of pending records
+        self._pending_lock = threading.Lock()
+        self.last_error = None
+        self._conn().executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ---------- writes ----------
+    def put(self, session_id, idea, kind, content, **meta):
+        record = {
+            "session_id": session_id or DEFAULT_SESSION,
+            "idea_key": idea_key(idea),
+            "kind": kind,
+            "idea": idea,
+            "content": content,
+            "meta": meta,
+            "created_at": time.time(),
+        }
+        key = (record["session_id"], record["idea_key"], kind)
+        with self._pending_lock:
+            self._pending.setdefault(key, []).append(record)
+        self._queue.put(record)
+
+    def _write_loop(self):
+        conn = self._conn()
+        while True:
+            record = self._queue.get()
+            key = (record["session_id"], record["idea_key"], record["kind"])
+            try:
+                with conn:
+                    (latest,) = conn.execute(
+                        "SELECT COALESCE(MAX(version), 0) FROM artifacts WHERE session_id = ? AND idea_key = ? AND kind = ?",
+                        key,
+                    ).fetchone()
+                    conn.execute(
+                        "INSERT INTO artifacts (session_id, idea_key, kind, version, idea, content, meta, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*key, latest + 1, record["idea"], record["content"],
+                         json.dumps(record["meta"]), record["created_at"]),
+                    )
+            except sqlite3.Error as exc:
+                # Keep the writer alive; the failure is visible via last_error.
+                self.last_error = exc
+            finally:
+                with self._pending_lock:
+                    pending = [r for r in self._pending.get(key, []) if r is not record]
+                    if pending:
+                        self._pending[key] = pending
+                    else:
+                        self._pending.pop(key, None)
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued write has been committed."""
+        self._queue.join()
+
+    # ---------- reads ----------
+    def latest(self, session_id, idea, kind="business_model"):
+        """Newest version for (session, idea, kind) as a dict, or None."""
+        key = (session_id or DEFAULT_SESSION, idea_key(idea), kind)
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending:
+                return {**pending[-1], "version": None}
+        row = self._conn().execute(
+            "SELECT * FROM artifacts WHERE session_id = ? AND idea_key = ? AND kind = ? "
+            "ORDER BY version DESC LIMIT 1",
+            key,
+        ).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def history(self, session_id, idea=None, kind="business_model", limit=20):
+        """Stored versions for a session (optionally one idea), newest first."""
+        sql = "SELECT * FROM artifacts WHERE session_id = ? AND kind = ?"
+        params = [session_id or DEFAULT_SESSION, kind]
+        if idea is not None:
+            sql += " AND idea_key = ?"
+            params.append(idea_key(idea))
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [_row_to_dict(row) for row in self._conn().execute(sql, params)]
+
+
+def _row_to_dict(row):
+    record = dict(row)
+    record["meta"] = json.loads(record["meta"])
+    return record
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore()
+    return _store
@@ -1,24 +1,45 @@
 # agents/business_model.py
 
-import google.generativeai as genai
-import json
-
+import asyncio
+import contextvars
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import re
+import threading
+from itertools import chain
+from agents import llm, model_policy, prefetch, speculation, tracing
+from agents.business_sections import (
+    FULL_REBUILD, INSTRUCTIONS, SECTION_KEYS, SOURCES, TITLES, affected_sections, parse_sections,
+    render_heading, render_section, render_sections, waves,
+)
+from agents.streaming import finalize_stream
+from agents.artifact_store import get_store
+from agents.cache import get_cache, make_key
+from agents.context import render_context
 
 # --------------------------------
-# ⚙️ CONFIGURE GEMINI
+# ⚙️ MODELS
 # --------------------------------
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
-classifier_model = genai.GenerativeModel("gemini-2.5-flash")  # fast, for classification
+MODEL_NAME = "gemini-2.5-flash"
+CLASSIFIER_MODEL_NAME = model_policy.LIGHTEST  # yes/no classification
+
+# Typical output sizes, used to pick a model tier that fits the turn's budget.
+FULL_MODEL_TOKENS = 1200
+SECTION_TOKENS = 250
+CHAT_TOKENS = 500
+
+# Draft the sections of a new business model as parallel calls instead of one long one.
+PARALLEL_SECTIONS = os.getenv("BUSINESS_PARALLEL_SECTIONS", "0") == "1"
+
+_executor = None
+_executor_lock = threading.Lock()
 
 
 # --------------------------------
 # 💼 SYSTEM INSTRUCTION
 # --------------------------------
+# Bump whenever the prompts below change so cached business models are not reused.
+BUSINESS_PROMPT_VERSION = "2"
+
 BUSINESS_SYSTEM_PROMPT = """
 You are 'BizAI' — a startup business consultant specialized in entrepreneurship, business modeling, and financial strategy.
 
@@ -39,9 +60,8 @@ Rules:
 # --------------------------------
 # 🧠 SMART INTENT DETECTION
 # --------------------------------
-def should_generate_business_model(user_input: str) -> bool:
-    """Ask the small model if the user is requesting a business model."""
-    classification_prompt = f"""
+def _intent_prompt(user_input):
+    return f"""
 You are an intent classifier for a startup assistant.
 
 User said: "{user_input}"
@@ -50,68 +70,279 @@ Determine if the user wants to GENERATE or UPDATE a BUSINESS MODEL for a known s
 
 Answer only 'yes' or 'no' — no explanations.
 """
-    response = classifier_model.generate_content(classification_prompt)
-    return "yes" in response.text.strip().lower()
+
+
+# Unambiguous requests skip the intent classifier call.
+BUSINESS_MODEL_REQUEST = re.compile(
+    r"\b(?:generate|create|build|make|give me|write|draft|show me|update|redo|regenerate)\b"
+    r".{0,40}\bbusiness (?:model|plan|canvas)\b",
+    re.IGNORECASE,
+)
+
+
+def should_generate_business_model(user_input: str) -> bool:
+    """Ask the small model if the user is requesting a business model."""
+    if BUSINESS_MODEL_REQUEST.search(user_input):
+        return True
+    with tracing.span("business.intent"):
+        response = llm.generate(CLASSIFIER_MODEL_NAME, _intent_prompt(user_input))
+    return "yes" in response.lower()
+
+
+async def should_generate_business_model_async(user_input: str) -> bool:
+    if BUSINESS_MODEL_REQUEST.search(user_input):
+        return True
+    with tracing.span("business.intent"):
+        response = await llm.agenerate(CLASSIFIER_MODEL_NAME, _intent_prompt(user_input))
+    return "yes" in response.lower()
 
 
 # --------------------------------
 # 🏗️ BUSINESS MODEL GENERATION
 # --------------------------------
-def generate_business_model(selected_idea, chat_history):
-    """Generate a structured business model for a startup idea."""
-    prompt = f"""{BUSINESS_SYSTEM_PROMPT}
+def _full_prompt(selected_idea, user_request=None):
+    request = f'\nUser request: "{user_request}"\n' if user_request else ""
+    return f"""{BUSINESS_SYSTEM_PROMPT}
 
 Analyze the startup idea: "{selected_idea}" (do not rename or rebrand it).
 
 Create a structured and concise business model including:
-1. **Business Model Canvas (9 Blocks)** – each block in 1–2 bullet points.
-2. **Revenue Streams** – 2–3 main income sources.
-3. **Cost Structure** – list main fixed & variable costs.
-4. **Pricing Strategy** – suggest simple, clear pricing tiers or key price points.
-5. **Break-even Estimate** – provide round-number assumptions.
-6. **Investor Summary** – short paragraph on opportunities & risks.
-7. **Alternative Scenarios** – short paragraph for 1–2 alternative business strategies.
-"""
-    response = model.generate_content(prompt)
-    business_model = response.text.strip()
-
-    chat_history.append({"role": "system", "content": "Business model generated."})
-
-    # Save output for record
-    with open("business_model.json", "w", encoding="utf-8") as f:
-        json.dump(
-            {"idea": selected_idea, "business_model": business_model},
-            f,
-            indent=4,
-            ensure_ascii=False,
-        )
+""" + "\n".join(
+        f"{render_heading(key)} – {INSTRUCTIONS[key]}." for key in SECTION_KEYS
+    ) + """
+
+Start each section with its numbered heading exactly as written above, on its own line.
+""" + request
+
+
+def _section_prompt(selected_idea, key, sections, user_request):
+    parts = [
+        BUSINESS_SYSTEM_PROMPT,
+        f'Startup idea: "{selected_idea}" (do not rename or rebrand it).',
+        f'Write only the body of the "{TITLES[key]}" section of its business model: {INSTRUCTIONS[key]}.',
+    ]
+    if sections.get(key):
+        parts.append(f"Current version of this section:\n{sections[key]}")
+    related = [render_section(source, sections[source]) for source in SOURCES.get(key, []) if source in sections]
+    if related:
+        parts.append("Related sections (keep consistent with them):\n" + "\n\n".join(related))
+    if user_request:
+        parts.append(f'User request: "{user_request}"')
+    parts.append("Reply with the section body only — no heading, no other sections. Keep it concise.")
+    return "\n\n".join(parts) + "\n"
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(max_workers=len(SECTION_KEYS), thread_name_prefix="business-section")
+    return _executor
+
+
+def _section_choice(keys):
+    prompt_tokens = tracing.estimate_tokens(BUSINESS_SYSTEM_PROMPT) + 2 * SECTION_TOKENS
+    return model_policy.choose(MODEL_NAME, prompt_tokens, SECTION_TOKENS * len(keys))
+
+
+def _generate_section(selected_idea, key, sections, user_request, choice):
+    with tracing.span("business.section", section=key, model=choice.model):
+        prompt = choice.apply(_section_prompt(selected_idea, key, sections, user_request))
+        return llm.generate(choice.model, prompt).strip()
+
+
+def _regenerate(selected_idea, sections, keys, user_request, choice):
+    """Regenerate keys wave by wave (see waves()); sections in one wave run in parallel."""
+    sections = dict(sections)
+    for wave in waves(keys):
+        if len(wave) == 1 or not PARALLEL_SECTIONS:
+            for key in wave:
+                sections[key] = _generate_section(selected_idea, key, sections, user_request, choice)
+            continue
+        # copy_context() so the section spans attach to the current turn.
+        futures = {
+            key: _get_executor().submit(
+                contextvars.copy_context().run, _generate_section, selected_idea, key, sections, user_request, choice
+            )
+            for key in wave
+        }
+        for key, future in futures.items():
+            sections[key] = future.result()
+    return sections
+
+
+async def _regenerate_async(selected_idea, sections, keys, user_request, choice):
+    """_regenerate on the event loop: every section in a wave is requested concurrently."""
+    async def generate(key, sections):
+        with tracing.span("business.section", section=key, model=choice.model):
+            prompt = choice.apply(_section_prompt(selected_idea, key, sections, user_request))
+            return (await llm.agenerate(choice.model, prompt)).strip()
+
+    sections = dict(sections)
+    for wave in waves(keys):
+        bodies = await asyncio.gather(*(generate(key, sections) for key in wave))
+        sections.update(zip(wave, bodies))
+    return sections
+
+
+def _stream_regenerate(selected_idea, sections, keys, user_request, choice, on_complete):
+    """Stream the whole document: unchanged sections as-is, regenerated ones as they arrive."""
+    sections = dict(sections)
+    if PARALLEL_SECTIONS and len(keys) > 1:
+        sections = _regenerate(selected_idea, sections, keys, user_request, choice)
+        keys = []
+    for i, key in enumerate(SECTION_KEYS):
+        if i:
+            yield "\n\n"
+        if key not in keys:
+            yield render_section(key, sections[key])
+            continue
+        yield render_heading(key) + "\n"
+        chunks = []
+        with tracing.span("business.section", section=key, model=choice.model):
+            prompt = choice.apply(_section_prompt(selected_idea, key, sections, user_request))
+            for chunk in llm.generate(choice.model, prompt, stream=True):
+                chunks.append(chunk)
+                yield chunk
+        sections[key] = "".join(chunks).strip()
+    on_complete(sections)
+
+
+def _prepare(selected_idea, chat_history, session_id, user_request):
+    """
+    Look up what a generate/update can reuse. Returns (content, sections,
+    keys, request, save): content is set when the answer is already known;
+    otherwise sections is None for a single-call draft (a first draft, or
+    a stored model whose sections could not be parsed), or the sections to
+    start from with keys to regenerate. save(result, choice)
+    records the finished model.
+    """
+    cache = get_cache()
+    store = get_store()
+    cache_key = make_key("business_model", MODEL_NAME, BUSINESS_PROMPT_VERSION, selected_idea)
+    rebuild = bool(user_request and FULL_REBUILD.search(user_request))
+    with tracing.span("business.cache_lookup") as lookup:
+        stored = None if rebuild else store.latest(session_id, selected_idea)
+        # A shortened (degraded) draft is kept for history but never built upon: redraft it in full.
+        if stored is not None and (
+            stored["meta"].get("prompt_version") != BUSINESS_PROMPT_VERSION or stored["meta"].get("degraded")
+        ):
+            stored = None
+        cached = None if rebuild or stored is not None else cache.get(cache_key)
+        source = "store" if stored is not None else "cache" if cached is not None else None
+        lookup.set(cache_hit=source is not None, source=source)
+
+    def save(result, choice=None):
+        choice = choice or model_policy.Choice(MODEL_NAME)
+        if stored is not None:
+            note = f"Business model updated: {', '.join(TITLES[key] for key in keys)}."
+        else:
+            note = "Business model generated."
+        chat_history.append({"role": "system", "content": note})
+
+        if isinstance(result, dict):
+            sections, content = result, render_sections(result)
+        else:
+            sections, content = parse_sections(result), result
+        if not content:
+            return
+        if source is None and not choice.degraded:
+            speculation.defer(cache.set, cache_key, content)  # full first drafts only; updates are session-specific
+
+        # Versioned record per (session, idea); the write happens off the request path.
+        with tracing.span("business.save", chars=len(content)):
+            speculation.defer(
+                store.put, session_id, selected_idea, "business_model", content,
+                model=choice.model, prompt_version=BUSINESS_PROMPT_VERSION,
+                sections=sections, updated=keys, degraded=choice.degraded,
+            )
+
+    if stored is not None:
+        keys = affected_sections(user_request or "")
+        if not keys:
+            chat_history.append({"role": "system", "content": "Business model generated."})
+            return stored["content"], None, keys, None, save
+        sections = stored["meta"].get("sections") or {}
+        if not sections:
+            keys = SECTION_KEYS  # sections could not be parsed: redraft the document in one call
+            return None, None, keys, user_request, save
+        return None, sections, keys, user_request, save
+    if cached is not None:
+        keys = []
+        save(cached)
+        return cached, None, keys, None, save
+    if PARALLEL_SECTIONS:
+        keys = SECTION_KEYS
+        return None, {}, keys, None, save
+    keys = []  # first draft in a single call
+    return None, None, keys, None, save
+
+
+def generate_business_model(selected_idea, chat_history, stream=False, session_id=None, user_request=None):
+    """
+    Generate or update a structured business model for a startup idea.
+    With stream=True, returns an iterator of text chunks instead of a string.
+
+    The model is kept as per-section records. A follow-up (user_request)
+    that names sections regenerates only those and the sections derived
+    from them; everything else is reused from this session's stored
+    version, or the shared response cache for a first draft.
+    """
+    content, sections, keys, request, save = _prepare(selected_idea, chat_history, session_id, user_request)
+    if content is not None:
+        return iter([content]) if stream else content
+
+    if sections is None:
+        prompt = _full_prompt(selected_idea, request)
+        choice = model_policy.choose(MODEL_NAME, tracing.estimate_tokens(prompt), FULL_MODEL_TOKENS)
+        prompt = choice.apply(prompt)
+        if stream:
+            return finalize_stream(llm.generate(choice.model, prompt, stream=True), lambda text: save(text, choice))
+        business_model = llm.generate(choice.model, prompt)
+        save(business_model, choice)
+        return business_model
+
+    choice = _section_choice(keys)
+    if stream:
+        return _stream_regenerate(selected_idea, sections, keys, request, choice, lambda result: save(result, choice))
+    sections = _regenerate(selected_idea, sections, keys, request, choice)
+    save(sections, choice)
+    return render_sections(sections)
+
+
+async def generate_business_model_async(selected_idea, chat_history, session_id=None, user_request=None):
+    """
+    generate_business_model for asyncio callers (no streaming). Store and
+    cache I/O runs in worker threads, off the event loop.
+    """
+    content, sections, keys, request, save = await asyncio.to_thread(
+        _prepare, selected_idea, chat_history, session_id, user_request
+    )
+    if content is not None:
+        return content
 
-    return business_model
+    if sections is None:
+        prompt = _full_prompt(selected_idea, request)
+        choice = model_policy.choose(MODEL_NAME, tracing.estimate_tokens(prompt), FULL_MODEL_TOKENS)
+        business_model = await llm.agenerate(choice.model, choice.apply(prompt))
+        await asyncio.to_thread(save, business_model, choice)
+        return business_model
+
+    choice = _section_choice(keys)
+    sections = await _regenerate_async(selected_idea, sections, keys, request, choice)
+    await asyncio.to_thread(save, sections, choice)
+    return render_sections(sections)
 
 
 # --------------------------------
 # 💬 CONVERSATION HANDLER
 # --------------------------------
-def get_role_and_content(msg):
-    """Normalize message structure between dict and LangChain types."""
-    if hasattr(msg, "type") and hasattr(msg, "content"):
-        role = "user" if msg.type == "human" else "assistant"
-        content = msg.content
-    elif isinstance(msg, dict):
-        role = msg.get("role", "assistant")
-        content = msg.get("content", "")
-    else:
-        role, content = "assistant", str(msg)
-    return role, content
-
-
-def chat_with_agent(user_input, chat_history):
-    """Engage in normal conversation about business strategy."""
-    context = "\n".join(
-        [f"{get_role_and_content(msg)[0].capitalize()}: {get_role_and_content(msg)[1]}" for msg in chat_history[-6:]]
-    )
-
-    prompt = f"""{BUSINESS_SYSTEM_PROMPT}
+def _chat_prompt(user_input, chat_history, session_state):
+    context = render_context(chat_history, "business", session_state, capitalize=True)
+    return f"""{BUSINESS_SYSTEM_PROMPT}
 
 Conversation context:
 {context}
@@ -121,10 +352,17 @@ User just asked: "{user_input}"
 If the question is unrelated to business, politely decline.
 Otherwise, respond as a professional consultant would.
 """
-    response = model.generate_content(prompt)
-    reply = response.text.strip()
 
-    reply = response.text.strip()
+
+def chat_with_agent(user_input, chat_history, stream=False, session_state=None):
+    """Engage in normal conversation about business strategy."""
+    prompt = _chat_prompt(user_input, chat_history, session_state)
+    choice = model_policy.choose(MODEL_NAME, tracing.estimate_tokens(prompt), CHAT_TOKENS)
+    prompt = choice.apply(prompt)
+    if stream:
+        return llm.generate(choice.model, prompt, stream=True)
+
+    reply = llm.generate(choice.model, prompt)
 
     # NOTE: We do NOT append to chat_history here. 
     # Manager Agent handles it.
@@ -132,15 +370,48 @@ Otherwise, respond as a professional consultant would.
     return reply
 
 
+async def chat_with_agent_async(user_input, chat_history, session_state=None):
+    prompt = _chat_prompt(user_input, chat_history, session_state)
+    choice = model_policy.choose(MODEL_NAME, tracing.estimate_tokens(prompt), CHAT_TOKENS)
+    return await llm.agenerate(choice.model, choice.apply(prompt))
+
+
 # --------------------------------
 # 🚀 MAIN ENTRY POINT
 # --------------------------------
-def run_business_agent(user_input, chat_history=[], selected_idea=None):
-    """Main interface used by the manager agent."""
+def run_business_agent(user_input, chat_history=[], selected_idea=None, stream=False, session_state=None):
+    """
+    Main interface used by the manager agent.
+    With stream=True, the reply is an iterator of text chunks.
+    """
     if selected_idea and should_generate_business_model(user_input):
-        business_model = generate_business_model(selected_idea, chat_history)
-        reply = f"Here's the business model for **{selected_idea}**:\n\n{business_model}"
+        header = f"Here's the business model for **{selected_idea}**:\n\n"
+        # A draft prefetched on idea selection lands in the artifact store; wait for it if still running.
+        prefetch.claim(session_state, "business", selected_idea)
+        business_model = generate_business_model(
+            selected_idea, chat_history, stream=stream,
+            session_id=getattr(session_state, "session_id", None), user_request=user_input,
+        )
+        if stream:
+            reply = chain([header], business_model)
+        else:
+            reply = header + business_model
+    else:
+        reply = chat_with_agent(user_input, chat_history, stream=stream, session_state=session_state)
+
+    return reply, chat_history
+
+
+async def run_business_agent_async(user_input, chat_history=[], selected_idea=None, session_state=None):
+    """run_business_agent for asyncio callers; the reply is always a string."""
+    if selected_idea and await should_generate_business_model_async(user_input):
+        await prefetch.claim_async(session_state, "business", selected_idea)
+        business_model = await generate_business_model_async(
+            selected_idea, chat_history,
+            session_id=getattr(session_state, "session_id", None), user_request=user_input,
+        )
+        reply = f"Here's the business model for **{selected_idea}**:\n\n" + business_model
     else:
-        reply = chat_with_agent(user_input, chat_history)
+        reply = await chat_with_agent_async(user_input, chat_history, session_state=session_state)
 
     return reply, chat_history
@@ -0,0 +1,124 @@
+# agents/business_sections.py
+
+import re
+
+# --------------------------------
+# 📑 SECTIONS
+# --------------------------------
+# (key, title, what to write, keywords that mark a follow-up as touching it)
+SECTIONS = [
+    ("canvas", "Business Model Canvas (9 Blocks)", "each of the 9 blocks in 1–2 bullet points",
+     r"canvas|9 blocks|nine blocks|value prop|customer segment|channel|customer relationship|"
+     r"key (?:partner|activit|resource)"),
+    ("revenue", "Revenue Streams", "2–3 main income sources",
+     r"revenue|income|monetiz|monetis|subscription|commission"),
+    ("costs", "Cost Structure", "main fixed & variable costs",
+     r"cost|expense|spend|budget|overhead|salar|burn"),
+    ("pricing", "Pricing Strategy", "simple, clear pricing tiers or key price points",
+     r"pric|tier|freemium|discount|charge"),
+    ("break_even", "Break-even Estimate", "round-number assumptions and the resulting break-even point",
+     r"break.?even|payback|profitab"),
+    ("investor_summary", "Investor Summary", "a short paragraph on opportunities & risks",
+     r"investor|pitch|funding|risk|opportunit|valuation"),
+    ("alternatives", "Alternative Scenarios", "a short paragraph on 1–2 alternative business strategies",
+     r"alternative|scenario|pivot|instead|other strateg"),
+]
+SECTION_KEYS = [key for key, *_ in SECTIONS]
+TITLES = {key: title for key, title, *_ in SECTIONS}
+INSTRUCTIONS = {key: instruction for key, _, instruction, _ in SECTIONS}
+KEYWORDS = {key: re.compile(pattern, re.IGNORECASE) for key, *_, pattern in SECTIONS}
+
+# Sections computed from others: regenerating a source also refreshes these.
+DEPENDENTS = {
+    "revenue": ["break_even"],
+    "costs": ["break_even"],
+    "pricing": ["break_even"],
+}
+SOURCES = {}
+for _source, _dependents in DEPENDENTS.items():
+    for _dependent in _dependents:
+        SOURCES.setdefault(_dependent, []).append(_source)
+
+# Follow-ups that ask for the whole model again.
+FULL_REBUILD = re.compile(r"\b(?:from scratch|start over|regenerate (?:it|everything|the (?:whole|entire))|"
+                          r"whole (?:business )?model|entire (?:business )?model|all sections)\b", re.IGNORECASE)
+
+_HEADING = re.compile(r"^[#*\s]*(\d)\s*[.)]\s*\**\s*(.+?)\s*\**\s*[:–-]*\s*$")
+
+
+# --------------------------------
+# 🔀 PARSE & RENDER
+# --------------------------------
+def parse_sections(text):
+    """
+    Split a full business model into {key: body}. Returns None unless all
+    seven numbered section headings are found in order.
+    """
+    sections = {}
+    current = None
+    body = []
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        key = _heading_key(match) if match else None
+        if key is not None and key not in sections and (current is None or key != current):
+            if current is not None:
+                sections[current] = "\n".join(body).strip()
+            current, body = key, []
+            continue
+        if current is not None:
+            body.append(line)
+    if current is not None:
+        sections[current] = "\n".join(body).strip()
+    if list(sections) != SECTION_KEYS:
+        return None
+    return sections
+
+
+def _heading_key(match):
+    number, title = int(match.group(1)), match.group(2).lower()
+    if not 1 <= number <= len(SECTIONS):
+        return None
+    key, expected, *_ = SECTIONS[number - 1]
+    # Match on the first word of the title so small wording changes still count.
+    return key if expected.lower().split()[0] in title else None
+
+
+def render_heading(key):
+    return f"**{SECTION_KEYS.index(key) + 1}. {TITLES[key]}**"
+
+
+def render_section(key, body):
+    return f"{render_heading(key)}\n{body.strip()}"
+
+
+def render_sections(sections):
+    return "\n\n".join(render_section(key, sections[key]) for key in SECTION_KEYS if key in sections)
+
+
+# --------------------------------
+# 🎯 AFFECTED SECTIONS
+# --------------------------------
+def affected_sections(user_input):
+    """
+    Sections a follow-up asks to change, plus the sections derived from them,
+    in document order. Empty when it names none.
+    """
+    touched = {key for key, pattern in KEYWORDS.items() if pattern.search(user_input)}
+    for key in list(touched):
+        touched.update(DEPENDENTS.get(key, []))
+    return [key for key in SECTION_KEYS if key in touched]
+
+
+def waves(keys):
+    """
+    Order sections for regeneration: every section in a wave only depends on
+    sections outside the set or in an earlier wave, so a wave can run in parallel.
+    """
+    pending = list(keys)
+    result = []
+    while pending:
+        blocked = {dep for key in pending for dep in DEPENDENTS.get(key, [])}
+        wave = [key for key in pending if key not in blocked]
+        result.append(wave)
+        pending = [key for key in pending if key not in wave]
+    return result
@@ -0,0 +1,170 @@
+# agents/cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+MEMORY_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "256"))
+DISK_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_DISK_BYTES", str(64 * 1024 * 1024)))
+
+
+def normalize(text):
+    """Case- and whitespace-insensitive form of a prompt or idea."""
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+
+def make_key(agent, model_name, prompt_version, prompt):
+    payload = json.dumps([agent, model_name, prompt_version, normalize(prompt)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --------------------------------
+# 🗄️ TWO-TIER CACHE
+# --------------------------------
+class ResponseCache:
+    """
+    In-memory LRU in front of a SQLite table that survives restarts.
+    Entries expire after ttl_seconds; the disk tier evicts least recently
+    used rows once it grows past max_disk_bytes.
+    """
+
+    def __init__(
+        self,
+        path=CACHE_PATH,
+        ttl_seconds=CACHE_TTL_SECONDS,
+        max_memory_entries=MEMORY_MAX_ENTRIES,
+        max_disk_bytes=DISK_MAX_BYTES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            db = self._conn()
+            row = db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                db.commit()
+                self._remember(key, row[0], row[1])
+                self._stats["disk_hits"] += 1
+                return row[0]
+            if row is not None:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db, now):
+        expired = db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        self._stats["evictions"] += max(expired, 0)
+
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn().execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn().commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn().execute("DELETE FROM responses")
+            self._conn().commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"], stats["disk_bytes"] = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide response cache shared by every agent that opts in."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
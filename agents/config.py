@@ -0,0 +1,23 @@
+# agents/config.py
+
+import threading
+
+_configured = False
+_lock = threading.Lock()
+
+
+def configure():
+    """
+    One-time process configuration shared by every agent: loads .env into
+    os.environ. Idempotent; called by the app entry points before anything
+    reads settings, and by the LLM backend on first use.
+    """
+    global _configured
+    if _configured:
+        return
+    with _lock:
+        if not _configured:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _configured = True
@@ -0,0 +1,120 @@
+# agents/context.py
+
+import re
+
+from agents.messages import Message, get_role_and_content  # noqa: F401  (re-exported)
+from agents.tracing import estimate_tokens
+
+# --------------------------------
+# ⚙️ BUDGETS (estimated tokens)
+# --------------------------------
+AGENT_BUDGETS = {
+    "manager": 800,
+    "ideation": 3000,
+    "business": 1500,
+    "legal": 1200,
+}
+SUMMARY_SHARE = 0.25        # part of the budget reserved for the rolling summary
+ARTIFACT_CHARS = 1500       # longer messages are treated as artifacts
+ARTIFACT_EXCERPT_CHARS = 300
+SUMMARY_LINE_CHARS = 160
+
+BUSINESS_MODEL_HEADER = re.compile(r"Here's the business model for \*\*(.+)\*\*:")
+
+
+# --------------------------------
+# ✂️ ARTIFACTS & SUMMARY LINES
+# --------------------------------
+def compact(content):
+    """Replace large artifacts (e.g. full business models) with a short reference."""
+    if len(content) <= ARTIFACT_CHARS:
+        return content
+    match = BUSINESS_MODEL_HEADER.search(content)
+    if match:
+        return (
+            f"[Business model for {match.group(1)} was generated earlier "
+            f"({len(content)} chars, not repeated here).]"
+        )
+    excerpt = content[:ARTIFACT_EXCERPT_CHARS].rsplit(" ", 1)[0]
+    return f"{excerpt} … [{len(content) - len(excerpt)} more chars omitted]"
+
+
+def summary_line(role, content):
+    """One-line extractive summary of a message: its first sentence, capped."""
+    text = " ".join(compact(content).split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS].rsplit(" ", 1)[0] + " …"
+    return f"{role}: {first}"
+
+
+# --------------------------------
+# 🪟 CONTEXT WINDOW
+# --------------------------------
+def context_window(history, agent, session_state=None):
+    """
+    Split history into (summary, recent) for the agent's token budget.
+
+    recent is a list of Messages kept verbatim (artifacts compacted), newest
+    last. Everything older is folded into summary, which is updated
+    incrementally on session_state.context_summaries when given.
+    """
+    budget = AGENT_BUDGETS[agent]
+    recent_budget = int(budget * (1 - SUMMARY_SHARE))
+
+    recent = []
+    used = 0
+    start = len(history)
+    for msg in reversed(history):
+        msg = Message.of(msg)
+        cost = msg.tokens
+        if recent and used + cost > recent_budget:
+            break
+        if cost > recent_budget:
+            # A single oversized message still fits, truncated to the budget.
+            truncated = Message(msg.role, msg.compacted[: recent_budget * 4] + " …", id=msg.id)
+            truncated._compacted = truncated.content  # already compacted; don't shorten it again
+            msg, cost = truncated, recent_budget
+        recent.append(msg)
+        used += cost
+        start -= 1
+    recent.reverse()
+
+    summary = _fold_summary(history, start, agent, budget - recent_budget, session_state)
+    return summary, recent
+
+
+def _fold_summary(history, upto, agent, budget, session_state):
+    summaries = getattr(session_state, "context_summaries", None) if session_state is not None else None
+    if summaries is None:
+        summaries = {}
+        if session_state is not None:
+            session_state.context_summaries = summaries
+
+    # Positions are absolute, so a resumed conversation holding only its
+    # newest messages keeps its summaries; skipped ones come from the log.
+    base = getattr(history, "base", 0)
+    upto += base
+    folded, lines, dropped = summaries.get(agent, (0, [], False))
+    if folded > upto:
+        folded, lines, dropped = 0, [], False  # history was rewritten; start over
+
+    new = history.between(folded, upto) if base else history[folded:upto]
+    lines = lines + [Message.of(msg).summary for msg in new]
+    while lines and sum(estimate_tokens(line) + 1 for line in lines) > budget:
+        lines.pop(0)
+        dropped = True
+    summaries[agent] = (upto, lines, dropped)
+
+    if not lines:
+        return ""
+    return "\n".join((["(earlier turns omitted)"] if dropped else []) + lines)
+
+
+def render_context(history, agent, session_state=None, capitalize=False):
+    """Text context block: summary of older turns followed by recent turns."""
+    summary, recent = context_window(history, agent, session_state)
+    lines = [msg.line(capitalize) for msg in recent]
+    if summary:
+        lines.insert(0, f"Summary of earlier conversation:\n{summary}\n")
+    return "\n".join(lines)
@@ -0,0 +1,201 @@
+# agents/conversation_log.py
+
+import json
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+from agents.messages import Conversation, Message
+from agents.session import SESSION_ID, SessionStore
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+CONVERSATION_LOG_DIR = os.getenv("CONVERSATION_LOG_DIR", os.path.join(".data", "sessions"))
+RESUME_WINDOW = int(os.getenv("RESUME_WINDOW", "50"))  # messages loaded on resume
+FSYNC = os.getenv("CONVERSATION_LOG_FSYNC", "0") == "1"
+
+# Session fields restored on resume, besides the conversation itself.
+SNAPSHOT_FIELDS = ("selected_idea", "generated_ideas", "last_agent", "context_summaries")
+
+OFFSET = struct.Struct("<Q")  # one little-endian uint64 byte offset per message
+
+
+# --------------------------------
+# 📜 CONVERSATION LOG
+# --------------------------------
+class ConversationLog:
+    """
+    Append-only log of one session's messages:
+
+    - log.jsonl  one {"role", "content"} object per line;
+    - log.idx    the byte offset of every line, fixed-width, so message i
+                 is found by reading 8 bytes at 8 × i;
+    - meta.json  a snapshot of the selected idea, generated ideas, last
+                 agent and rolling context summaries, replaced atomically.
+
+    Reads go through mmap, so loading the last N messages costs the same
+    however long the session is.
+    """
+
+    def __init__(self, session_id, root=CONVERSATION_LOG_DIR):
+        if not SESSION_ID.fullmatch(str(session_id)):
+            raise ValueError(f"invalid session id: {session_id!r}")
+        self.session_id = session_id
+        self.dir = os.path.join(root, session_id)
+        self.log_path = os.path.join(self.dir, "log.jsonl")
+        self.idx_path = os.path.join(self.dir, "log.idx")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.idx_path)
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.idx_path) // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    # ---------- writes ----------
+    def append(self, messages):
+        """
+        Append messages; the log line is written before its index entry.
+        Holds an exclusive lock on the index, so several processes can
+        append to the same session. Returns the log length afterwards.
+        """
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self.idx_path, "ab") as idx:
+                if fcntl is not None:
+                    fcntl.flock(idx.fileno(), fcntl.LOCK_EX)
+                try:
+                    # Re-read the index length under the lock: other writers may have appended.
+                    count = os.fstat(idx.fileno()).st_size // OFFSET.size
+                    if not messages:
+                        return count
+                    with open(self.log_path, "ab") as log:
+                        offset = log.tell()
+                        lines, offsets = [], []
+                        for msg in messages:
+                            role, content = Message.of(msg)
+                            line = json.dumps({"role": role, "content": content}, ensure_ascii=False).encode("utf-8") + b"\n"
+                            offsets.append(OFFSET.pack(offset))
+                            lines.append(line)
+                            offset += len(line)
+                        log.write(b"".join(lines))
+                        log.flush()
+                        if FSYNC:
+                            os.fsync(log.fileno())
+                    idx.write(b"".join(offsets))
+                    idx.flush()
+                    if FSYNC:
+                        os.fsync(idx.fileno())
+                    return count + len(messages)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(idx.fileno(), fcntl.LOCK_UN)
+
+    def write_meta(self, meta):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{self.meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    # ---------- reads ----------
+    def read_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def read(self, start, stop):
+        """Messages start..stop-1 (absolute positions)."""
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        with open(self.idx_path, "rb") as idx:
+            idx.seek(start * OFFSET.size)
+            raw = idx.read((stop - start) * OFFSET.size)
+        offsets = [OFFSET.unpack_from(raw, i * OFFSET.size)[0] for i in range(stop - start)]
+        messages = []
+        with open(self.log_path, "rb") as log, mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in offsets:
+                end = mm.find(b"\n", offset)
+                record = json.loads(mm[offset:end if end != -1 else len(mm)])
+                messages.append(Message(record["role"], record["content"]))
+        return messages
+
+
+# --------------------------------
+# 🔁 RESUME / SAVE
+# --------------------------------
+def resume(session_state, window=RESUME_WINDOW):
+    """
+    Attach the session's log to session_state, restoring the snapshot
+    fields and the last window messages if the log already exists. Older
+    messages stay on disk until Conversation.load_older() pages them in.
+    """
+    log = ConversationLog(session_state.session_id)
+    count = len(log)
+    for name, value in log.read_meta().items():
+        if name == "context_summaries" and value:
+            value = {agent: (upto, lines, dropped) for agent, (upto, lines, dropped) in value.items()}
+        if name in SNAPSHOT_FIELDS:
+            setattr(session_state, name, value)
+    base = max(count - window, 0)
+    session_state.conversation = Conversation(log.read(base, count), base=base, log=log, saved=count)
+    return count
+
+
+def save_turn(session_state):
+    """
+    Persist the messages this conversation added since its last save and
+    refresh the snapshot (no-op without a log). What is unsaved is tracked
+    on the conversation, not derived from the log's length, which another
+    tab or process may have moved.
+    """
+    conversation = session_state.conversation
+    log = getattr(conversation, "log", None)
+    if log is None:
+        return
+    count = log.append(conversation[max(conversation.saved - conversation.base, 0):])
+    conversation.saved = conversation.total
+    log.write_meta({
+        "count": count,
+        **{name: getattr(session_state, name, None) for name in SNAPSHOT_FIELDS},
+    })
+
+
+class LogSessionStore(SessionStore):
+    """SessionStore backed by the conversation logs, so server sessions survive restarts."""
+
+    def __init__(self, window=RESUME_WINDOW, cache=None):
+        from agents.session import MemorySessionStore
+
+        self.window = window
+        self._cache = cache or MemorySessionStore()
+
+    async def load(self, session_id):
+        session_state = await self._cache.load(session_id)
+        if session_state is None and SESSION_ID.fullmatch(session_id) and ConversationLog(session_id).exists():
+            from agents.session import SessionState
+
+            session_state = SessionState(session_id)
+            resume(session_state, self.window)
+            await self._cache.save(session_state)
+        return session_state
+
+    async def save(self, session_state):
+        if session_state.conversation.log is None:  # new session
+            session_state.conversation.log = ConversationLog(session_state.session_id)
+        save_turn(session_state)
+        await self._cache.save(session_state)
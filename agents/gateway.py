@@ -0,0 +1,288 @@
+# agents/gateway.py
+
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+# Requests per second and burst size per model; anything else uses DEFAULT_LIMIT.
+# A rate of 0 (or less) means unlimited.
+MODEL_LIMITS = {
+    "gemini-2.5-flash": (float(os.getenv("GATEWAY_FLASH_RPS", "5")), int(os.getenv("GATEWAY_FLASH_BURST", "10"))),
+    "gemini-2.5-flash-lite": (float(os.getenv("GATEWAY_LITE_RPS", "10")), int(os.getenv("GATEWAY_LITE_BURST", "20"))),
+}
+DEFAULT_LIMIT = (5.0, 10)
+
+MAX_ATTEMPTS = int(os.getenv("GATEWAY_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 8.0
+
+TRANSIENT_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "InternalError", "GatewayTimeout", "TimeoutError", "ConnectionError",
+}
+TRANSIENT_CODES = {429, 500, 502, 503, 504}
+
+
+def is_transient(exc):
+    """Rate limits, timeouts and 5xx are retried; anything else surfaces immediately."""
+    if type(exc).__name__ in TRANSIENT_ERRORS:
+        return True
+    code = getattr(exc, "code", None)
+    code = getattr(code, "value", code)
+    return code in TRANSIENT_CODES
+
+
+# --------------------------------
+# 🪣 TOKEN BUCKET
+# --------------------------------
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.unlimited = rate <= 0
+        self.capacity = max(burst, 1)  # a bucket that can never hold a token would never admit a call
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self):
+        """Take a token if one is available; else return the seconds until one will be."""
+        if self.unlimited:
+            return 0.0
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available; returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self):
+        """acquire() for event-loop callers: waits without blocking the loop."""
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+# --------------------------------
+# 🔁 SINGLE-FLIGHT
+# --------------------------------
+class _Flight:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+# --------------------------------
+# 🚪 GATEWAY
+# --------------------------------
+class Gateway:
+    """
+    Process-wide front door for model calls: a token bucket per model,
+    jittered exponential retry on transient errors, and single-flight
+    coalescing so identical in-flight prompts share one upstream call.
+    """
+
+    def __init__(self, limits=None, max_attempts=MAX_ATTEMPTS):
+        self.limits = dict(MODEL_LIMITS if limits is None else limits)
+        self.max_attempts = max_attempts
+        self._buckets = {}
+        self._flights = {}
+        self._async_flights = {}
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(lambda: defaultdict(float))
+        self._queued = defaultdict(int)
+
+    def _bucket(self, model_name):
+        with self._lock:
+            bucket = self._buckets.get(model_name)
+            if bucket is None:
+                bucket = self._buckets[model_name] = TokenBucket(*self.limits.get(model_name, DEFAULT_LIMIT))
+            return bucket
+
+    def _count(self, model_name, name, value=1):
+        with self._lock:
+            self._metrics[model_name][name] += value
+
+    def _enqueue(self, model_name, delta):
+        with self._lock:
+            self._queued[model_name] += delta
+            stats = self._metrics[model_name]
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], self._queued[model_name])
+
+    def _admit(self, model_name):
+        """Wait for a rate-limit token, tracking how many callers are queued."""
+        self._enqueue(model_name, 1)
+        try:
+            waited = self._bucket(model_name).acquire()
+        finally:
+            self._enqueue(model_name, -1)
+        self._count(model_name, "throttled_s", waited)
+
+    async def _admit_async(self, model_name):
+        self._enqueue(model_name, 1)
+        try:
+            waited = await self._bucket(model_name).acquire_async()
+        finally:
+            self._enqueue(model_name, -1)
+        self._count(model_name, "throttled_s", waited)
+
+    def _with_retry(self, model_name, fn):
+        for attempt in range(self.max_attempts):
+            self._admit(model_name)
+            self._count(model_name, "upstream_calls")
+            try:
+                return fn()
+            except Exception as exc:
+                if not is_transient(exc) or attempt == self.max_attempts - 1:
+                    self._count(model_name, "errors")
+                    raise
+                self._count(model_name, "retries")
+                time.sleep(random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt)))
+
+    async def _with_retry_async(self, model_name, make_coro):
+        for attempt in range(self.max_attempts):
+            await self._admit_async(model_name)
+            self._count(model_name, "upstream_calls")
+            try:
+                return await make_coro()
+            except Exception as exc:
+                if not is_transient(exc) or attempt == self.max_attempts - 1:
+                    self._count(model_name, "errors")
+                    raise
+                self._count(model_name, "retries")
+                await asyncio.sleep(random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt)))
+
+    def call(self, model_name, prompt_key, fn):
+        """
+        Run fn() under the model's limits. Concurrent calls with the same
+        (model_name, prompt_key) wait for the first one and share its result.
+        """
+        key = (model_name, hashlib.sha256(prompt_key.encode("utf-8")).hexdigest())
+        with self._lock:
+            self._metrics[model_name]["requests"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+                self._metrics[model_name]["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._with_retry(model_name, fn)
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def acall(self, model_name, prompt_key, make_coro):
+        """
+        call() for event-loop callers: make_coro() returns the awaitable for
+        one upstream attempt. Identical in-flight prompts on the same loop
+        share one task; a cancelled caller does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), model_name, hashlib.sha256(prompt_key.encode("utf-8")).hexdigest())
+        with self._lock:
+            self._metrics[model_name]["requests"] += 1
+            task = self._async_flights.get(key)
+            if task is None:
+                task = self._async_flights[key] = loop.create_task(self._with_retry_async(model_name, make_coro))
+                task.add_done_callback(lambda done: self._drop_async_flight(key, done))
+            else:
+                self._metrics[model_name]["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _drop_async_flight(self, key, task):
+        with self._lock:
+            self._async_flights.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here too, in case every waiter was cancelled
+
+    def stream(self, model_name, start_stream):
+        """
+        Rate-limited stream. Failures before the first chunk are retried;
+        once text has been yielded, errors surface to the caller.
+        """
+        self._count(model_name, "requests")
+        for attempt in range(self.max_attempts):
+            self._admit(model_name)
+            self._count(model_name, "upstream_calls")
+            try:
+                chunks = iter(start_stream())
+                first = next(chunks, None)
+            except Exception as exc:
+                if not is_transient(exc) or attempt == self.max_attempts - 1:
+                    self._count(model_name, "errors")
+                    raise
+                self._count(model_name, "retries")
+                time.sleep(random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt)))
+                continue
+            if first is not None:
+                yield first
+            yield from chunks
+            return
+
+    def metrics(self):
+        """Per-model counters plus the current rate-limit queue depth."""
+        with self._lock:
+            return {
+                model_name: {
+                    **{name: round(value, 3) for name, value in stats.items()},
+                    "queue_depth": self._queued[model_name],
+                    "in_flight": sum(1 for m, _ in self._flights if m == model_name)
+                    + sum(1 for _, m, _ in self._async_flights if m == model_name),
+                }
+                for model_name, stats in self._metrics.items()
+            }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = Gateway()
+    return _gateway
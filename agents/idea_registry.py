@@ -0,0 +1,294 @@
+# agents/idea_registry.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, defaultdict
+
+from agents.artifact_store import DEFAULT_SESSION
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+IDEA_REGISTRY_PATH = os.getenv("IDEA_REGISTRY_PATH", os.path.join(".data", "ideas.sqlite3"))
+
+NGRAM = 3                   # character n-grams for fuzzy name matching
+MATCH_THRESHOLD = 0.6       # share of an idea name's n-grams found in the user text
+MAX_POSTING_SHARE = 0.05    # n-grams in more names than this are too common to narrow candidates
+MATCH_CANDIDATES = 50
+
+SHINGLE = 5                 # character shingles for MinHash
+NUM_PERM = 32
+BANDS = 8                   # LSH: 8 bands x 4 rows, ~0.6 Jaccard detection threshold
+DUPLICATE_THRESHOLD = 0.6
+DUPLICATE_CANDIDATES = 100  # verified per lookup, ranked by shared LSH bands
+
+FIELDS = ("problem", "solution", "target_users", "feasibility")
+FIELD_LABELS = {
+    "problem": r"problem",
+    "solution": r"solution",
+    "target_users": r"target (?:users|audience|customers|market)",
+    "feasibility": r"feasibility(?: score)?",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ideas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    problem TEXT,
+    solution TEXT,
+    target_users TEXT,
+    feasibility TEXT,
+    text TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    duplicate_of INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ideas_session ON ideas (session_id, id);
+"""
+
+_MERSENNE = (1 << 61) - 1
+_PERMS = [
+    (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+    for i in range(NUM_PERM)
+]
+
+
+# --------------------------------
+# 🔤 TEXT FEATURES
+# --------------------------------
+def normalize(text):
+    """Lowercase, drop markdown and punctuation, collapse whitespace."""
+    text = re.sub(r"[*_`#]", "", str(text).lower())
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def ngrams(text, n=NGRAM):
+    text = f" {normalize(text)} "
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def parse_idea(text):
+    """Structured fields from one extracted idea; missing fields are None."""
+    lines = [line.strip(" -*") for line in text.strip().splitlines() if line.strip()]
+    head = lines[0] if lines else text
+    name = re.split(r"\s+[–—-]\s+|:\s", head, maxsplit=1)[0]
+    idea = {"name": re.sub(r"[*_`]", "", name).strip() or head[:60], "text": text.strip()}
+    for field in FIELDS:
+        match = re.search(
+            rf"(?im)^[\s*\-]*\**(?:{FIELD_LABELS[field]})\**\s*[:–-]\s*\**\s*(.+)$", text
+        )
+        idea[field] = match.group(1).strip(" *") if match else None
+    if idea["problem"] is None and idea["solution"] is None:
+        # "**Name** – one-line pitch" format: the pitch is the solution.
+        rest = head[len(name):].strip(" –—-:*")
+        idea["solution"] = rest or None
+    return idea
+
+
+def minhash(text):
+    """MinHash signature of the text's character shingles."""
+    text = normalize(text)
+    shingles = {zlib.crc32(text[i:i + SHINGLE].encode()) for i in range(max(1, len(text) - SHINGLE + 1))}
+    return array("Q", (min((a * h + b) % _MERSENNE for h in shingles) for a, b in _PERMS))
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _bands(signature):
+    rows = NUM_PERM // BANDS
+    return [hash((band, *signature[band * rows:(band + 1) * rows])) for band in range(BANDS)]
+
+
+def _fingerprint(idea):
+    return " ".join(filter(None, (idea["name"], idea["problem"], idea["solution"])))
+
+
+# --------------------------------
+# 🗂️ IDEA REGISTRY
+# --------------------------------
+class IdeaRegistry:
+    """
+    Every idea ideation has produced, across turns and sessions, in SQLite.
+
+    Lookups never touch the database: names are indexed by character
+    n-grams for fuzzy selection, and MinHash signatures are bucketed with
+    LSH so near-duplicates are found without comparing against every idea.
+    """
+
+    def __init__(self, path=IDEA_REGISTRY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._ideas = {}                          # id -> record
+        self._name_grams = {}                     # id -> n-grams of the name
+        self._postings = defaultdict(list)        # n-gram -> ids
+        self._buckets = defaultdict(list)         # LSH band hash -> ids
+        self._signatures = {}                     # id -> signature
+        self._by_session = defaultdict(list)      # session_id -> ids, oldest first
+        self._by_name = {}                        # (session_id, normalized name) -> id
+        self._load()
+
+    def _load(self):
+        rows = self._conn.execute(
+            "SELECT id, session_id, name, problem, solution, target_users, feasibility, text, signature, "
+            "duplicate_of, created_at FROM ideas ORDER BY id"
+        )
+        for row in rows:
+            record = dict(zip(
+                ("id", "session_id", "name", *FIELDS, "text", "signature", "duplicate_of", "created_at"), row
+            ))
+            signature = array("Q")
+            signature.frombytes(record.pop("signature"))
+            self._index(record, signature)
+
+    def _index(self, record, signature):
+        idea_id = record["id"]
+        self._ideas[idea_id] = record
+        grams = ngrams(record["name"])
+        self._name_grams[idea_id] = grams
+        for gram in grams:
+            self._postings[gram].append(idea_id)
+        self._signatures[idea_id] = signature
+        for band in _bands(signature):
+            self._buckets[band].append(idea_id)
+        self._by_session[record["session_id"]].append(idea_id)
+        self._by_name[(record["session_id"], normalize(record["name"]))] = idea_id
+
+    # ---------- writes ----------
+    def add_many(self, session_id, texts):
+        """Register extracted ideas; returns their records (existing ones for repeats in this session)."""
+        session_id = session_id or DEFAULT_SESSION
+        records = []
+        with self._lock, self._conn:
+            for text in texts:
+                idea = parse_idea(text)
+                existing = self._by_name.get((session_id, normalize(idea["name"])))
+                if existing is not None:
+                    records.append(self._ideas[existing])
+                    continue
+                signature = minhash(_fingerprint(idea))
+                duplicates = self._near(signature, DUPLICATE_THRESHOLD)
+                record = {
+                    "session_id": session_id, **idea,
+                    "duplicate_of": duplicates[0][1]["id"] if duplicates else None,
+                    "created_at": time.time(),
+                }
+                cursor = self._conn.execute(
+                    "INSERT INTO ideas (session_id, name, problem, solution, target_users, feasibility, text, "
+                    "signature, duplicate_of, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, record["name"], *(record[f] for f in FIELDS), record["text"],
+                     signature.tobytes(), record["duplicate_of"], record["created_at"]),
+                )
+                record["id"] = cursor.lastrowid
+                self._index(record, signature)
+                records.append(record)
+        return records
+
+    # ---------- reads ----------
+    def find(self, text, session_id=None, limit=5, threshold=MATCH_THRESHOLD):
+        """
+        Ideas whose name appears (fuzzily) in text, best first, as
+        [(score, record)]. score is the share of the name's n-grams in text.
+        """
+        grams = ngrams(text)
+        with self._lock:
+            if session_id is not None:
+                # A session's own ideas are few: score them all, so names that are
+                # common across other sessions cannot crowd them out.
+                candidates = self._by_session.get(session_id or DEFAULT_SESSION, ())
+            else:
+                max_posting = max(MATCH_CANDIDATES, int(len(self._ideas) * MAX_POSTING_SHARE))
+                hits = Counter()
+                for gram in grams:
+                    posting = self._postings.get(gram)
+                    if posting and len(posting) <= max_posting:
+                        hits.update(posting)
+                candidates = [idea_id for idea_id, _ in hits.most_common(MATCH_CANDIDATES * 4)]
+            scored = []
+            for idea_id in candidates:
+                name_grams = self._name_grams[idea_id]
+                score = len(name_grams & grams) / len(name_grams)
+                if score >= threshold:
+                    scored.append((score, idea_id))
+        scored.sort(key=lambda item: (-item[0], -item[1]))  # ties: newest first
+        return [(score, self._ideas[idea_id]) for score, idea_id in scored[:limit]]
+
+    def near_duplicates(self, text, threshold=DUPLICATE_THRESHOLD, session_id=None):
+        """
+        Stored ideas similar to text (only session_id's when given), most
+        similar first, as [(similarity, record)]. An idea with the same name
+        is a repeat, not a near-duplicate, and is left out.
+        """
+        idea = parse_idea(text)
+        name = normalize(idea["name"])
+        signature = minhash(_fingerprint(idea))
+        with self._lock:
+            if session_id is None:
+                near = self._near(signature, threshold)
+            else:
+                # Compare against every idea of the session, not the global LSH top candidates.
+                scored = [
+                    (similarity(signature, self._signatures[idea_id]), idea_id)
+                    for idea_id in self._by_session.get(session_id, ())
+                ]
+                near = [
+                    (sim, self._ideas[idea_id])
+                    for sim, idea_id in sorted(scored, key=lambda item: (-item[0], item[1]))
+                    if sim >= threshold
+                ]
+            return [(sim, record) for sim, record in near if normalize(record["name"]) != name]
+
+    def _near(self, signature, threshold):
+        shared = Counter()
+        for band in _bands(signature):
+            shared.update(self._buckets.get(band, ()))
+        scored = [
+            (similarity(signature, self._signatures[idea_id]), idea_id)
+            for idea_id, _ in shared.most_common(DUPLICATE_CANDIDATES)
+        ]
+        return [
+            (sim, self._ideas[idea_id])
+            for sim, idea_id in sorted(scored, key=lambda item: (-item[0], item[1]))
+            if sim >= threshold
+        ]
+
+    def session_ideas(self, session_id, limit=None):
+        """A session's ideas, oldest first (the last `limit` when given)."""
+        with self._lock:
+            ids = self._by_session.get(session_id or DEFAULT_SESSION, [])
+            ids = ids[-limit:] if limit else list(ids)
+            return [self._ideas[idea_id] for idea_id in ids]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ideas": len(self._ideas),
+                "sessions": len(self._by_session),
+                "duplicates": sum(1 for record in self._ideas.values() if record["duplicate_of"] is not None),
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = IdeaRegistry()
+    return _registry
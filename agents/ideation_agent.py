@@ -1,22 +1,17 @@
 # agents/ideation_agent.py
 
-from langchain_google_genai.chat_models import ChatGoogleGenerativeAI
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
+import asyncio
 import re
+from agents import llm, model_policy, speculation, tracing
+from agents.artifact_store import DEFAULT_SESSION
+from agents.context import context_window
+from agents.idea_registry import MATCH_THRESHOLD, get_registry, ngrams, parse_idea
+from agents.streaming import finalize_stream
 
-print("all good")
+MODEL_NAME = "gemini-2.5-flash"
+REPLY_TOKENS = 700  # typical reply size, used to fit the turn's budget
 
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    api_key=os.getenv("GOOGLE_API_KEY")
-)
-
-system_message = SystemMessage(content="""
+IDEATION_SYSTEM_PROMPT = """
 You are 'StartAI' — an AI assistant specialized in helping entrepreneurs with startup ideation (Axe 1).
 Your domain is startup creation, business ideas, problem validation, and innovation strategies.
 
@@ -34,73 +29,152 @@ Always stay up to date — your suggestions should feel relevant **today**, not
   adult content, gambling, violence, weapons, political manipulation, scams, or discrimination.
 - When possible, output ideas in a structured format:
   **Idea name**, **Problem**, **Solution**, **Target users**, **Feasibility score**, and optionally **Trend relevance** (e.g., "AI + sustainability").
-""")
+"""
 
 def extract_ideas(text):
     """Extract a list of ideas from AI's text response (numbered format)."""
     ideas = re.findall(r'\d+\.\s*(.*?)(?=\n\d+\.|$)', text, re.DOTALL)
     return [idea.strip() for idea in ideas]
 
-def detect_chosen_idea(user_input, ideas):
-    """Detect if user selected one of the ideas (by number or name)."""
-    if not ideas:
-        return None
+CHOICE_NUMBER = re.compile(r"(?:\b(?:idea|number|option|no\.?)\s*#?|#)(\d+)\b|^\s*(\d+)\s*[.!]?\s*$")
+CHOICE_ORDINAL = re.compile(r"\b(first|second|third|fourth|fifth|last)\s+(?:one|idea|option)\b")
+ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "last": -1}
 
-    # Match “idea 2” or “number 2”
-    match = re.search(r"\b(?:idea|number|option)?\s*(\d+)\b", user_input.lower())
-    if match:
-        idx = int(match.group(1)) - 1
-        if 0 <= idx < len(ideas):
-            return ideas[idx]
+EXCLUDED_IDEAS = 30  # earlier ideas listed in the prompt so they are not suggested again
 
-    # Try matching by partial name
-    for idea in ideas:
-        name = idea.split("–")[0].split(":")[0].strip().lower()
-        if name in user_input.lower():
-            return idea
 
-    return None
+def detect_chosen_idea(user_input, ideas, session_id=None):
+    """
+    Detect if user selected an idea: by number or ordinal in the latest
+    list, else by (fuzzy) name from the latest list or this session's
+    earlier ideas.
+    """
+    text = user_input.lower()
+    if ideas:
+        match = CHOICE_NUMBER.search(text)
+        if match:
+            idx = int(match.group(1) or match.group(2)) - 1
+            if 0 <= idx < len(ideas):
+                return ideas[idx]
+        match = CHOICE_ORDINAL.search(text)
+        if match:
+            idx = ORDINALS[match.group(1)]
+            if idx <= len(ideas):
+                return ideas[idx - 1 if idx > 0 else idx]
+
+        grams = ngrams(user_input)
+        best_score, best = 0.0, None
+        for idea in ideas:
+            name_grams = ngrams(parse_idea(idea)["name"])
+            score = len(name_grams & grams) / len(name_grams) if name_grams else 0.0
+            if score > best_score:
+                best_score, best = score, idea
+        if best_score >= MATCH_THRESHOLD:
+            return best
+
+    # Only this session's ideas: never select another user's.
+    found = get_registry().find(user_input, session_id=session_id or DEFAULT_SESSION, limit=1)
+    return found[0][1]["text"] if found else None
+
+
+def near_duplicates(ideas, session_id):
+    """(new name, earlier name) for each idea that is a close variant of one this session already had."""
+    registry = get_registry()
+    variants = []
+    for text in ideas:
+        matches = registry.near_duplicates(text, session_id=session_id or DEFAULT_SESSION)
+        if matches:
+            variants.append((parse_idea(text)["name"], matches[0][1]["name"]))
+    return variants
+
+
+def remember_ideas(ai_reply, user_input, session_state):
+    """Register the reply's ideas and pick up the user's choice, if any."""
+    if session_state is None:
+        return
+    session_id = getattr(session_state, "session_id", None)
+    ideas = extract_ideas(ai_reply)
+    if ideas:
+        variants = near_duplicates(ideas, session_id)
+        if variants:
+            # Kept in the context so later turns can tell the user, and avoid more variants.
+            pairs = "; ".join(f"{name} ≈ {earlier}" for name, earlier in variants)
+            session_state.conversation.append({
+                "role": "system",
+                "content": f"Some new ideas are close variants of earlier suggestions: {pairs}.",
+            })
+        speculation.defer(get_registry().add_many, session_id, ideas)
+        session_state.generated_ideas = ideas
 
-def run_ideation_agent(user_input, chat_history=[], session_state=None):
+    chosen = detect_chosen_idea(user_input, getattr(session_state, "generated_ideas", None), session_id)
+    if chosen:
+        session_state.selected_idea = chosen
+
+
+def _ideation_messages(user_input, chat_history, session_state):
+    # Budgeted window: rolling summary of older turns + recent turns verbatim
+    summary, recent = context_window(chat_history, "ideation", session_state)
+    messages = [("system", IDEATION_SYSTEM_PROMPT)]
+    if summary:
+        messages.append(("system", f"Summary of earlier conversation:\n{summary}"))
+    # Messages unpack as (role, content) and keep their LangChain form between turns;
+    # compacted artifacts are sent as plain pairs.
+    messages += [
+        msg if msg.compacted is msg.content else (msg.role, msg.compacted)
+        for msg in recent
+        if msg.role in ("user", "assistant")
+    ]
+
+    # Ideas already suggested, so new suggestions are not repeats or close variants.
+    session_id = getattr(session_state, "session_id", None)
+    earlier = get_registry().session_ideas(session_id, limit=EXCLUDED_IDEAS) if session_id else []
+    if earlier:
+        names = "; ".join(dict.fromkeys(idea["name"] for idea in earlier))
+        messages.append((
+            "system",
+            f"Ideas already suggested in this conversation: {names}. "
+            "When asked for new ideas, do not repeat these or close variants of them.",
+        ))
+
+    messages.append(("user", user_input))
+    return messages
+
+
+def _choose_model(messages):
+    """Model tier for this reply; a degraded choice adds a brevity instruction before the user turn."""
+    prompt_tokens = tracing.tokens_for_chars(sum(len(content) for _, content in messages))
+    choice = model_policy.choose(MODEL_NAME, prompt_tokens, REPLY_TOKENS)
+    if choice.brevity():
+        messages.insert(len(messages) - 1, ("system", choice.brevity()))
+    return choice.model
+
+
+def run_ideation_agent(user_input, chat_history=[], session_state=None, stream=False):
     """
     Takes user input, generates or updates startup ideas, and optionally stores chosen idea.
+    With stream=True, the reply is an iterator of text chunks; ideas are
+    extracted once the stream completes.
     """
-    # Convert chat_history to LangChain message objects
-    lc_history = []
-    for msg in chat_history:
-        role = ""
-        content = ""
-        if hasattr(msg, "type") and hasattr(msg, "content"):
-            role = "user" if msg.type == "human" else "assistant"
-            content = msg.content
-        elif isinstance(msg, dict):
-            role = msg.get("role", "assistant")
-            content = msg.get("content", "")
-        else:
-            role = "assistant" 
-            content = str(msg)
-        
-        if role == "user":
-            lc_history.append(HumanMessage(content=content))
-        elif role == "assistant":
-            lc_history.append(AIMessage(content=content))
-
-    lc_history.append(HumanMessage(content=user_input))
-    response = llm(lc_history)
-    ai_reply = response.content
-    
+    messages = _ideation_messages(user_input, chat_history, session_state)
+    model_name = _choose_model(messages)
+
     # NOTE: We do NOT append to chat_history here anymore.
     # The Manager Agent handles memory updates to avoid duplication.
+    def on_reply(ai_reply):
+        remember_ideas(ai_reply, user_input, session_state)
 
-    # Extract ideas from AI’s answer (store in session for reference)
-    ideas = extract_ideas(ai_reply)
-    if session_state is not None and ideas:
-        session_state.generated_ideas = ideas
+    if stream:
+        return finalize_stream(llm.chat(model_name, messages, stream=True), on_reply), chat_history
+
+    ai_reply = llm.chat(model_name, messages)
+    on_reply(ai_reply)
+
+    return ai_reply, chat_history
 
-    # Detect user choosing an idea
-    if session_state is not None and hasattr(session_state, "generated_ideas"):
-        chosen = detect_chosen_idea(user_input, session_state.generated_ideas)
-        if chosen:
-            session_state.selected_idea = chosen
 
+async def run_ideation_agent_async(user_input, chat_history=[], session_state=None):
+    """run_ideation_agent for asyncio callers; the reply is always a string."""
+    messages = _ideation_messages(user_input, chat_history, session_state)
+    ai_reply = await llm.achat(_choose_model(messages), messages)
+    await asyncio.to_thread(remember_ideas, ai_reply, user_input, session_state)  # registry is SQLite
     return ai_reply, chat_history
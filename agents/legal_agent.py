@@ -1,12 +1,40 @@
-import google.generativeai as genai
+import asyncio
+import re
 
-import os
-from dotenv import load_dotenv
+from agents import llm, model_policy, prefetch, speculation, tracing
+from agents.artifact_store import idea_key
+from agents.context import render_context
+from agents.router import CONTINUATION_PATTERN
+from agents.semantic_cache import get_semantic_cache
+from agents.streaming import finalize_stream
 
-load_dotenv()
+MODEL_NAME = "gemini-2.5-flash-lite"
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash-lite")
+# Bump whenever LEGAL_SYSTEM_PROMPT changes so cached answers are not reused.
+LEGAL_PROMPT_VERSION = "1"
+CACHE_NAMESPACE = f"legal:{MODEL_NAME}:{LEGAL_PROMPT_VERSION}"
+ANSWER_TOKENS = 600  # typical answer size, used to fit the turn's budget
+
+# Questions about the user's own startup are cached per selected idea.
+IDEA_DEPENDENT = re.compile(
+    r"\b(?:my|our|this|the)\s+(?:idea|startup|app|product|platform|business|company|service|project)\b"
+    r"|\b(?:we|our|us)\b|\bfor (?:it|me)\b",
+    re.IGNORECASE,
+)
+
+# Questions the prefetched idea checklist answers: the whole question must be
+# a request for the idea's legal risks / checklist, nothing more specific.
+CHECKLIST_REQUEST = re.compile(
+    r"^(?:(?:ok(?:ay)?|so|now|please)[,\s]+)*"
+    r"(?:(?:what are|what're|list|give me|show me|tell me|can you (?:list|give me))\s+)?"
+    r"(?:the\s+|a\s+)?(?:main\s+|key\s+|biggest\s+)?"
+    r"(?:legal|regulatory|compliance)\s+(?:risks?|issues?|checklist|requirements?)"
+    r"(?:\s+and\s+(?:a\s+|the\s+)?(?:legal\s+|compliance\s+)?(?:risks?|checklist))?"
+    r"(?:\s+(?:for|of)\s+(?:my|our|this|the)\s+(?:idea|startup|app|product|business|company|project))?"
+    r"(?:\s+please)?\s*[?.!]*$",
+    re.IGNORECASE,
+)
+CHECKLIST_QUESTION = "What are the main legal risks for this startup, and what compliance checklist should it follow?"
 
 LEGAL_SYSTEM_PROMPT = """
 You are 'LexAI' — a legal and regulatory compliance assistant for startups (Axe 6).
@@ -30,23 +58,62 @@ Rules:
   4. **Disclaimer**
 """
 
-def get_role_and_content(msg):
-    if hasattr(msg, "type") and hasattr(msg, "content"):
-        role = "user" if msg.type == "human" else "assistant"
-        content = msg.content
-    elif isinstance(msg, dict):
-        role = msg.get("role", "assistant")
-        content = msg.get("content", "")
-    else:
-        role, content = "assistant", str(msg)
-    return role, content
-
-def chat_with_legal_agent(user_input, chat_history):
-    context = "\n".join(
-        [f"{get_role_and_content(msg)[0]}: {get_role_and_content(msg)[1]}" for msg in chat_history[-6:]]
-    )
+def cache_context(user_input, selected_idea):
+    """
+    Semantic cache key context for a question: "" for general questions,
+    the selected idea for questions about it, None for follow-ups that only
+    make sense with the conversation (never cached).
+    """
+    text = user_input.strip().lower()
+    if len(text.split()) < 3 or CONTINUATION_PATTERN.match(text):
+        return None
+    if selected_idea and (IDEA_DEPENDENT.search(text) or idea_key(selected_idea).split(" – ")[0] in text):
+        return idea_key(selected_idea)
+    return ""
+
+
+def legal_checklist(selected_idea):
+    """Idea-specific legal risks and compliance checklist (prefetched on idea selection)."""
     prompt = f"""{LEGAL_SYSTEM_PROMPT}
 
+Startup idea: "{selected_idea}"
+
+User just asked: "{CHECKLIST_QUESTION}"
+
+Respond as a professional legal assistant, specific to this startup idea.
+"""
+    return llm.generate(MODEL_NAME, prompt)
+
+
+def _reuse(user_input, cache_key, checklist, selected_idea):
+    """A prefetched checklist or semantic-cache hit that answers the question, else None."""
+    cache = get_semantic_cache()
+    if checklist:
+        # Cached under the question it was written for, so only paraphrases of it hit.
+        speculation.defer(cache.add, CHECKLIST_QUESTION, checklist, CACHE_NAMESPACE, idea_key(selected_idea))
+        return checklist
+    if cache_key is not None:
+        with tracing.span("legal.semantic_cache") as lookup:
+            hit = cache.lookup(user_input, CACHE_NAMESPACE, cache_key)
+            lookup.set(cache_hit=hit is not None, similarity=hit and round(hit["similarity"], 3))
+        if hit is not None:
+            return hit["answer"]
+    return None
+
+
+def _remember(user_input, cache_key, choice):
+    def remember(reply):
+        # Shortened answers are not reused for later questions.
+        if cache_key is not None and reply and not choice.degraded:
+            speculation.defer(get_semantic_cache().add, user_input, reply, CACHE_NAMESPACE, cache_key)
+
+    return remember
+
+
+def _chat_prompt(user_input, chat_history, session_state):
+    context = render_context(chat_history, "legal", session_state)
+    return f"""{LEGAL_SYSTEM_PROMPT}
+
 Conversation context:
 {context}
 
@@ -55,11 +122,54 @@ User just asked: "{user_input}"
 If unrelated to legal/compliance, politely decline.
 Otherwise, respond as a professional legal assistant.
 """
-    reply = model.generate_content(prompt).text.strip()
+
+
+def chat_with_legal_agent(user_input, chat_history, stream=False, session_state=None):
+    selected_idea = getattr(session_state, "selected_idea", None)
+    cache_key = cache_context(user_input, selected_idea)
+    checklist = None
+    if selected_idea and CHECKLIST_REQUEST.match(user_input.strip()):
+        checklist = prefetch.claim(session_state, "legal", selected_idea)
+    answer = _reuse(user_input, cache_key, checklist, selected_idea)
+    if answer is not None:
+        return iter([answer]) if stream else answer
+
+    prompt = _chat_prompt(user_input, chat_history, session_state)
+    choice = model_policy.choose(MODEL_NAME, tracing.estimate_tokens(prompt), ANSWER_TOKENS)
+    remember = _remember(user_input, cache_key, choice)
+    prompt = choice.apply(prompt)
+    if stream:
+        return finalize_stream(llm.generate(choice.model, prompt, stream=True), remember)
+
+    reply = llm.generate(choice.model, prompt)
+    remember(reply)
     # NOTE: We do NOT append to chat_history here. 
     # Manager Agent handles it.
     return reply
 
-def run_legal_agent(user_input, chat_history=[]):
-    reply = chat_with_legal_agent(user_input, chat_history)
+
+async def chat_with_legal_agent_async(user_input, chat_history, session_state=None):
+    selected_idea = getattr(session_state, "selected_idea", None)
+    cache_key = cache_context(user_input, selected_idea)
+    checklist = None
+    if selected_idea and CHECKLIST_REQUEST.match(user_input.strip()):
+        checklist = await prefetch.claim_async(session_state, "legal", selected_idea)
+    # The semantic cache is SQLite: keep its reads and writes off the event loop.
+    answer = await asyncio.to_thread(_reuse, user_input, cache_key, checklist, selected_idea)
+    if answer is not None:
+        return answer
+
+    prompt = _chat_prompt(user_input, chat_history, session_state)
+    choice = model_policy.choose(MODEL_NAME, tracing.estimate_tokens(prompt), ANSWER_TOKENS)
+    reply = await llm.agenerate(choice.model, choice.apply(prompt))
+    await asyncio.to_thread(_remember(user_input, cache_key, choice), reply)
+    return reply
+
+def run_legal_agent(user_input, chat_history=[], stream=False, session_state=None):
+    reply = chat_with_legal_agent(user_input, chat_history, stream=stream, session_state=session_state)
+    return reply, chat_history
+
+
+async def run_legal_agent_async(user_input, chat_history=[], session_state=None):
+    reply = await chat_with_legal_agent_async(user_input, chat_history, session_state=session_state)
     return reply, chat_history
@@ -0,0 +1,422 @@
+# agents/llm.py
+
+import asyncio
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+from agents import model_policy, tracing
+from agents.config import configure
+from agents.gateway import get_gateway
+from agents.messages import Message
+from agents.streaming import stream_text
+
+
+# --------------------------------
+# 🔌 BACKEND INTERFACE
+# --------------------------------
+class LLMBackend:
+    """
+    What every agent talks to. Prompts are plain strings; chat messages are
+    (role, content) pairs with role in {"system", "user", "assistant"}.
+    """
+
+    name = "base"
+
+    def generate(self, model_name, prompt):
+        raise NotImplementedError
+
+    def stream(self, model_name, prompt):
+        """Yield text chunks. Default: the full reply as a single chunk."""
+        yield self.generate(model_name, prompt)
+
+    def chat(self, model_name, messages):
+        raise NotImplementedError
+
+    def stream_chat(self, model_name, messages):
+        yield self.chat(model_name, messages)
+
+    async def agenerate(self, model_name, prompt):
+        """Awaitable generate. Default: the blocking call on a worker thread."""
+        return await asyncio.to_thread(self.generate, model_name, prompt)
+
+    async def achat(self, model_name, messages):
+        return await asyncio.to_thread(self.chat, model_name, messages)
+
+
+# --------------------------------
+# ♊ GEMINI
+# --------------------------------
+class GeminiBackend(LLMBackend):
+    """
+    google-generativeai for prompts, LangChain's chat model for chat turns.
+    Both SDKs are imported on first use, not when this module is imported.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key=None):
+        import google.generativeai as genai
+
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        genai.configure(api_key=self.api_key)
+        self._genai = genai
+        self._models = {}
+        self._chat_models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name):
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self._genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def _chat_model(self, model_name):
+        with self._lock:
+            if model_name not in self._chat_models:
+                from langchain_google_genai.chat_models import ChatGoogleGenerativeAI
+
+                self._chat_models[model_name] = ChatGoogleGenerativeAI(model=model_name, api_key=self.api_key)
+            return self._chat_models[model_name]
+
+    def generate(self, model_name, prompt):
+        return self._model(model_name).generate_content(prompt).text.strip()
+
+    def stream(self, model_name, prompt):
+        return stream_text(self._model(model_name).generate_content(prompt, stream=True))
+
+    def chat(self, model_name, messages):
+        return self._chat_model(model_name).invoke(to_langchain(messages)).content
+
+    def stream_chat(self, model_name, messages):
+        for chunk in self._chat_model(model_name).stream(to_langchain(messages)):
+            yield chunk.content
+
+    async def agenerate(self, model_name, prompt):
+        response = await self._model(model_name).generate_content_async(prompt)
+        return response.text.strip()
+
+    async def achat(self, model_name, messages):
+        return (await self._chat_model(model_name).ainvoke(to_langchain(messages))).content
+
+
+def to_langchain(messages):
+    from langchain.schema import SystemMessage, HumanMessage, AIMessage
+
+    types = {"system": SystemMessage, "user": HumanMessage, "assistant": AIMessage}
+    converted = []
+    for message in messages:
+        if isinstance(message, Message):
+            converted.append(message.as_langchain())  # cached on the message
+            continue
+        role, content = message
+        if role in types:
+            converted.append(types[role](content=content))
+    return [message for message in converted if message is not None]
+
+
+# --------------------------------
+# 🧪 OFFLINE STUB
+# --------------------------------
+STUB_IDEAS = """Here are some startup ideas:
+
+1. **SoilSense** – Low-cost soil sensors that tell small farmers when and how much to irrigate.
+2. **ShiftMate** – AI scheduling assistant for hourly workers and small shops.
+3. **LoopWear** – Subscription rental marketplace for second-hand kids' clothing.
+"""
+
+STUB_BUSINESS_MODEL = "\n\n".join(
+    f"**{i}. {title}**\n" + "\n".join(f"- Placeholder point {j} for {title.lower()}." for j in range(1, 6))
+    for i, title in enumerate(
+        [
+            "Business Model Canvas (9 Blocks)",
+            "Revenue Streams",
+            "Cost Structure",
+            "Pricing Strategy",
+            "Break-even Estimate",
+            "Investor Summary",
+            "Alternative Scenarios",
+        ],
+        start=1,
+    )
+)
+
+
+def _stub_route(prompt):
+    match = re.search(r'User message:\s*"(.*?)"\s*\n', prompt, re.DOTALL)
+    text = (match.group(1) if match else prompt).lower()
+    legal = re.search(r"legal|nda|contract|gdpr|patent|trademark|compliance|privacy", text)
+    business = re.search(r"business|pric|revenue|cost|investor|funding|break-even|model", text)
+    if legal and business:
+        return "Business+Legal"
+    if legal:
+        return "Legal"
+    if business:
+        return "Business"
+    if re.search(r"idea|startup|innovat|brainstorm|choose|pick|option", text):
+        return "Ideation"
+    return "None"
+
+
+def _stub_intent(prompt):
+    match = re.search(r'User said: "(.*?)"', prompt, re.DOTALL)
+    text = (match.group(1) if match else "").lower()
+    return "yes" if re.search(r"business model|generate|update|canvas", text) else "no"
+
+
+def _stub_section(prompt):
+    title = re.search(r'Write only the body of the "(.+?)" section', prompt).group(1)
+    request = re.search(r'User request: "(.*?)"', prompt, re.DOTALL)
+    note = f" (revised: {request.group(1)})" if request else ""
+    return "\n".join(f"- Placeholder point {j} for {title.lower()}{note}." for j in range(1, 4))
+
+
+# (pattern, reply or callable(prompt) -> reply), first match wins.
+DEFAULT_STUB_RULES = [
+    (r"Return one of:", _stub_route),
+    (r"intent classifier", _stub_intent),
+    (r"Create a structured and concise business model", STUB_BUSINESS_MODEL),
+    (r'Write only the body of the ".+?" section', _stub_section),
+    (r"(?is)\Auser: .*\bideas?\b", STUB_IDEAS),
+]
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend for benchmarks and load tests.
+
+    latency_ms is the time to first token; tokens_per_second throttles the
+    rest of the reply (0 = instant). rules map regex patterns over the prompt
+    to canned replies; anything unmatched is echoed back.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms=0.0, tokens_per_second=0.0, rules=None, echo_chars=200):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.rules = [(re.compile(p), r) for p, r in (DEFAULT_STUB_RULES if rules is None else rules)]
+        self.echo_chars = echo_chars
+
+    def reply_for(self, prompt):
+        for pattern, reply in self.rules:
+            if pattern.search(prompt):
+                return reply(prompt) if callable(reply) else reply
+        return f"Echo: {prompt[-self.echo_chars:].strip()}"
+
+    def _tokens(self, text):
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def stream(self, model_name, prompt):
+        time.sleep(self.latency_ms / 1000)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        for token in self._tokens(self.reply_for(prompt)):
+            if delay:
+                time.sleep(delay)
+            yield token
+
+    def generate(self, model_name, prompt):
+        return "".join(self.stream(model_name, prompt)).strip()
+
+    async def agenerate(self, model_name, prompt):
+        reply = self.reply_for(prompt)
+        delay = self.latency_ms / 1000
+        if self.tokens_per_second:
+            delay += len(self._tokens(reply)) / self.tokens_per_second
+        await asyncio.sleep(delay)
+        return reply.strip()
+
+    def _flatten(self, messages):
+        return "\n".join(f"{role}: {content}" for role, content in messages)
+
+    def chat(self, model_name, messages):
+        return self.generate(model_name, self._flatten(messages[-1:]))
+
+    def stream_chat(self, model_name, messages):
+        return self.stream(model_name, self._flatten(messages[-1:]))
+
+    async def achat(self, model_name, messages):
+        return await self.agenerate(model_name, self._flatten(messages[-1:]))
+
+
+# --------------------------------
+# 🎛️ BACKEND SELECTION
+# --------------------------------
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def make_backend_from_env():
+    """LLM_BACKEND=gemini (default) or stub (STUB_LATENCY_MS, STUB_TOKENS_PER_SEC)."""
+    configure()
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "stub":
+        return StubBackend(
+            latency_ms=float(os.getenv("STUB_LATENCY_MS", "0")),
+            tokens_per_second=float(os.getenv("STUB_TOKENS_PER_SEC", "0")),
+        )
+    if kind == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown LLM_BACKEND: {kind!r}")
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = make_backend_from_env()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the process-wide backend (e.g. a StubBackend for benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# --------------------------------
+# 🚦 PER-MODEL CONCURRENCY
+# --------------------------------
+_model_limits = {}
+_default_limit = None
+_limits_lock = threading.Lock()
+
+
+def set_model_concurrency(limit, model_name=None):
+    """
+    Cap in-flight calls to model_name (or to every model when None).
+    Used by batch runs so parallel sessions don't flood one model.
+    """
+    global _default_limit
+    with _limits_lock:
+        if model_name is None:
+            _default_limit = limit
+            _model_limits.clear()
+        else:
+            _model_limits[model_name] = threading.BoundedSemaphore(limit)
+
+
+def _slot(model_name):
+    with _limits_lock:
+        sem = _model_limits.get(model_name)
+        if sem is None and _default_limit is not None:
+            sem = _model_limits[model_name] = threading.BoundedSemaphore(_default_limit)
+    return sem
+
+
+def _limited_stream(sem, model_name, start_stream):
+    # The request is only started once a slot is held.
+    with sem or nullcontext():
+        yield from get_gateway().stream(model_name, start_stream)
+
+
+def _limited_call(sem, fn, *args):
+    with sem or nullcontext():
+        return fn(*args)
+
+
+def _observe(s, model_name):
+    """Feed a finished call's latency and token counts to the model policy."""
+    model_policy.observe(model_name, s.wall_ms, s.attrs.get("prompt_tokens", 0), s.attrs.get("response_tokens", 0))
+
+
+def _observed_stream(s, model_name, chunks):
+    try:
+        yield from tracing.trace_stream(s, chunks)
+    finally:
+        # Abandoned streams still used the model (and the turn's budget); failed ones are not samples.
+        if "error" not in s.attrs:
+            _observe(s, model_name)
+
+
+def chat_key(messages):
+    """Single-flight key for a chat request."""
+    return "\x1e".join(f"{role}\x1f{content}" for role, content in messages)
+
+
+# --------------------------------
+# 🧩 AGENT-FACING HELPERS
+# --------------------------------
+def generate(model_name, prompt, stream=False):
+    backend = get_backend()
+    sem = _slot(model_name)
+    s = tracing.open_span(
+        "llm", model=model_name, backend=backend.name, stream=stream,
+        prompt_chars=len(prompt), prompt_tokens=tracing.estimate_tokens(prompt),
+    )
+    if stream:
+        return _observed_stream(s, model_name, _limited_stream(sem, model_name, lambda: backend.stream(model_name, prompt)))
+    try:
+        text = get_gateway().call(model_name, prompt, lambda: _limited_call(sem, backend.generate, model_name, prompt))
+    except Exception as exc:
+        s.finish(error=type(exc).__name__)
+        raise
+    s.finish(response_chars=len(text), response_tokens=tracing.estimate_tokens(text))
+    _observe(s, model_name)
+    return text
+
+
+def chat(model_name, messages, stream=False):
+    backend = get_backend()
+    sem = _slot(model_name)
+    prompt_chars = sum(len(content) for _, content in messages)
+    s = tracing.open_span(
+        "llm", model=model_name, backend=backend.name, stream=stream,
+        prompt_chars=prompt_chars, prompt_tokens=tracing.tokens_for_chars(prompt_chars),
+    )
+    if stream:
+        return _observed_stream(
+            s, model_name, _limited_stream(sem, model_name, lambda: backend.stream_chat(model_name, messages))
+        )
+    try:
+        text = get_gateway().call(
+            model_name, chat_key(messages), lambda: _limited_call(sem, backend.chat, model_name, messages)
+        )
+    except Exception as exc:
+        s.finish(error=type(exc).__name__)
+        raise
+    s.finish(response_chars=len(text), response_tokens=tracing.estimate_tokens(text))
+    _observe(s, model_name)
+    return text
+
+
+# --------------------------------
+# ⏳ ASYNC HELPERS
+# --------------------------------
+# For event-loop callers. Calls go through the gateway's rate limits and
+# single-flight; the per-model thread semaphores above do not apply.
+async def agenerate(model_name, prompt):
+    backend = get_backend()
+    s = tracing.open_span(
+        "llm", model=model_name, backend=backend.name, stream=False, asynchronous=True,
+        prompt_chars=len(prompt), prompt_tokens=tracing.estimate_tokens(prompt),
+    )
+    try:
+        text = await get_gateway().acall(model_name, prompt, lambda: backend.agenerate(model_name, prompt))
+    except Exception as exc:
+        s.finish(error=type(exc).__name__)
+        raise
+    s.finish(response_chars=len(text), response_tokens=tracing.estimate_tokens(text))
+    _observe(s, model_name)
+    return text
+
+
+async def achat(model_name, messages):
+    backend = get_backend()
+    prompt_chars = sum(len(content) for _, content in messages)
+    s = tracing.open_span(
+        "llm", model=model_name, backend=backend.name, stream=False, asynchronous=True,
+        prompt_chars=prompt_chars, prompt_tokens=tracing.tokens_for_chars(prompt_chars),
+    )
+    try:
+        text = await get_gateway().acall(model_name, chat_key(messages), lambda: backend.achat(model_name, messages))
+    except Exception as exc:
+        s.finish(error=type(exc).__name__)
+        raise
+    s.finish(response_chars=len(text), response_tokens=tracing.estimate_tokens(text))
+    _observe(s, model_name)
+    return text
@@ -1,30 +1,64 @@
 # agents/manager_agent.py
 
-import google.generativeai as genai
-from agents.ideation_agent import run_ideation_agent
-from agents.business_agent import run_business_agent
-from agents.legal_agent import run_legal_agent
-
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import asyncio
+import contextvars
+import importlib
+import re
+import threading
+from agents import conversation_log, llm, model_policy, prefetch, router, speculation, tracing
+from agents.context import render_context
+from agents.session import new_session_id
+from agents.streaming import as_stream, finalize_stream
 
 # -------------------------------
 # 🔧 CONFIGURATION
 # -------------------------------
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-router_model = genai.GenerativeModel("gemini-2.5-flash-lite")
+ROUTER_MODEL_NAME = model_policy.LIGHTEST  # routing is classification: always the lightest tier
+FANOUT_WORKERS = 3
+
+# Section headings when several agents answer one message.
+AGENT_TITLES = {
+    "ideation": "💡 Ideation",
+    "business": "💼 Business",
+    "legal": "⚖️ Legal",
+}
 
 # -------------------------------
-# 🧠 LLM-BASED ROUTER
+# 🗂️ AGENT REGISTRY
 # -------------------------------
-def decide_agent(user_input, conversation_context):
+# Agents are imported on first use so importing the manager stays cheap.
+AGENT_REGISTRY = {
+    "ideation": ("agents.ideation_agent", "run_ideation_agent"),
+    "business": ("agents.business_agent", "run_business_agent"),
+    "legal": ("agents.legal_agent", "run_legal_agent"),
+}
+_loaded_agents = {}
+_registry_lock = threading.Lock()
+
+
+def get_agent(name, asynchronous=False):
     """
-    Uses an LLM to decide which agent should handle the user query.
-    Prioritizes unsafe and emotional detection before business logic.
+    Return the run_*_agent entry point for name (its run_*_agent_async
+    coroutine with asynchronous=True), importing its module on first use.
     """
-    router_prompt = f"""
+    key = (name, asynchronous)
+    agent = _loaded_agents.get(key)
+    if agent is None:
+        with _registry_lock:
+            agent = _loaded_agents.get(key)
+            if agent is None:
+                module_name, func_name = AGENT_REGISTRY[name]
+                if asynchronous:
+                    func_name += "_async"
+                agent = getattr(importlib.import_module(module_name), func_name)
+                _loaded_agents[key] = agent
+    return agent
+
+# -------------------------------
+# 🧠 LLM-BASED ROUTER
+# -------------------------------
+def _router_prompt(user_input, conversation_context):
+    return f"""
 You are the Manager Agent overseeing a team of AI specialists that help entrepreneurs.
 
 Agents available:
@@ -55,53 +89,247 @@ Your task:
 4️⃣ If the question is unrelated to these (e.g., math, jokes, random chat),
     return "None" and suggest focusing on one of the supported axes (Axe 1, 5, 6).
 
+5️⃣ If the message clearly asks for help from more than one of Ideation, Business and Legal
+    (e.g. "build a business model and list the legal risks"), return all of them joined by "+",
+    e.g. "Business+Legal".
+
 Return one of:
-"Ideation", "Business", "Legal", "Support", "Unsafe", or "None".
+"Ideation", "Business", "Legal", a "+"-joined combination of those, "Support", "Unsafe", or "None".
+Put the answer alone on the first line.
 """
-    response = router_model.generate_content(router_prompt)
-    decision = response.text.strip().lower()
 
+DECISION_TOKEN = re.compile(r"[a-z]+")
+
+
+def _parse_decision(decision):
     # Normalize model output
+    decision = decision.lower()
     if "unsafe" in decision:
         return "unsafe"
     elif "support" in decision:
         return "support"
-    elif "ideation" in decision:
-        return "ideation"
-    elif "business" in decision:
-        return "business"
-    elif "legal" in decision:
-        return "legal"
-    else:
-        return "none"
+    # Several agents only from a strict "business+legal" (or comma-separated) first line.
+    first_line = decision.strip().split("\n", 1)[0].strip(" \t\"'*`.")
+    parts = [part.strip(" \"'*`") for part in re.split(r"[+,]", first_line)]
+    if len(parts) > 1 and all(part in router.LOCAL_LABELS for part in parts):
+        return router.join_labels(parts)
+    # Otherwise a single agent: the first label mentioned.
+    for token in DECISION_TOKEN.findall(decision):
+        if token in router.LOCAL_LABELS:
+            return token
+    return "none"
+
+
+def decide_agent(user_input, conversation_context):
+    """
+    Uses an LLM to decide which agent should handle the user query.
+    Prioritizes unsafe and emotional detection before business logic.
+    """
+    return _parse_decision(llm.generate(ROUTER_MODEL_NAME, _router_prompt(user_input, conversation_context)))
+
+
+async def decide_agent_async(user_input, conversation_context):
+    """decide_agent for asyncio callers."""
+    return _parse_decision(
+        await llm.agenerate(ROUTER_MODEL_NAME, _router_prompt(user_input, conversation_context))
+    )
 
 # -------------------------------
-# 🧩 MANAGER HANDLER
+# ⚡ LOCAL FAST PATH
 # -------------------------------
-def get_role_and_content(msg):
-    """Normalize message format between LangChain and dict types."""
-    if hasattr(msg, "type") and hasattr(msg, "content"):
-        role = "user" if msg.type == "human" else "assistant"
-        content = msg.content
-    elif isinstance(msg, dict):
-        role = msg.get("role", "assistant")
-        content = msg.get("content", "")
-    else:
-        role, content = "assistant", str(msg)
-    return role, content
+def route_query(user_input, conversation_context, last_agent=None):
+    """
+    Routes locally when the classifier is confident (or the turn is a short
+    follow-up to the last agent); falls back to the LLM router otherwise.
+    """
+    label, reason = router.get_local_router().route(user_input, last_agent)
+    if label is not None:
+        router.stats.record(reason)
+        return label
+
+    with tracing.span("route.llm", reason=reason) as s:
+        label = decide_agent(user_input, conversation_context)
+    router.stats.record(reason, llm_latency_ms=s.wall_ms)
+    return label
+
+
+async def route_query_async(user_input, conversation_context, last_agent=None):
+    label, reason = router.get_local_router().route(user_input, last_agent)
+    if label is not None:
+        router.stats.record(reason)
+        return label
+
+    with tracing.span("route.llm", reason=reason) as s:
+        label = await decide_agent_async(user_input, conversation_context)
+    router.stats.record(reason, llm_latency_ms=s.wall_ms)
+    return label
+
+
+def get_router_stats():
+    """Local hit rate and the p50 LLM routing latency each hit saves."""
+    return router.stats.snapshot()
+
+# -------------------------------
+# 🏎️ SPECULATIVE DISPATCH
+# -------------------------------
+def speculative_route_and_dispatch(user_input, conversation_context, session_state):
+    """
+    When the LLM router is needed, start the most likely agent on a worker
+    thread at the same time. Returns (chosen_agent, reply); reply is None if
+    the guess was wrong (or nothing was speculated) and the caller must
+    dispatch normally.
+    """
+    last_agent = getattr(session_state, "last_agent", None)
+    local_router = router.get_local_router()
+    label, reason = local_router.route(user_input, last_agent)
+    if label is not None:
+        router.stats.record(reason)
+        return label, None
+
+    guess = last_agent if last_agent in router.LOCAL_LABELS else local_router.predict(user_input)[0]
+    if reason in ("guard", "off_topic") or guess not in router.LOCAL_LABELS:
+        return route_query(user_input, conversation_context, last_agent), None
+
+    scratch = speculation.SpeculativeState(session_state)
+    # copy_context() so the speculative agent's spans attach to this turn.
+    future = speculation.get_executor().submit(
+        contextvars.copy_context().run, speculation.run_timed, scratch.run, dispatch, guess, user_input, scratch
+    )
+
+    with tracing.span("route.llm", reason=reason) as s:
+        label = decide_agent(user_input, conversation_context)
+    router_ms = s.wall_ms
+    router.stats.record(reason, llm_latency_ms=router_ms)
+
+    if label != guess:
+        speculation.stats.record_miss(cancelled=future.cancel())
+        return label, None
 
+    reply, agent_ms = future.result()
+    scratch.commit(session_state)
+    # Serial cost would have been router + agent; we paid max(router, agent).
+    speculation.stats.record_commit(saved_ms=min(router_ms, agent_ms))
+    return label, reply
 
-def handle_query(user_input, session_state):
+
+def get_speculation_stats():
+    """Committed vs. wasted speculative calls and total latency saved."""
+    return speculation.stats.snapshot()
+
+# -------------------------------
+# 🧩 MANAGER HANDLER
+# -------------------------------
+def handle_query(user_input, session_state, stream=False, speculative=None):
     """
     Routes queries to the correct agent (Ideation, Business, or Legal),
     shares memory (selected idea, etc.), and declines out-of-scope topics.
+
+    With stream=True, the reply is an iterator of text chunks and memory is
+    updated once it has been fully consumed. With speculative=True (default:
+    SPECULATIVE_DISPATCH env), the likely agent runs alongside the LLM router;
+    streaming turns are never speculated.
     """
-    context = "\n".join(
-        f"{get_role_and_content(msg)[0]}: {get_role_and_content(msg)[1]}"
-        for msg in session_state.conversation[-10:]
-    )
+    if speculative is None:
+        speculative = speculation.SPECULATIVE_DISPATCH
+    if getattr(session_state, "session_id", None) is None:
+        session_state.session_id = new_session_id()
+
+    turn = tracing.start_turn(session_id=getattr(session_state, "session_id", None), stream=stream)
+    budget = model_policy.start_turn()
+    # An agent that raises still finishes the turn and releases its budget.
+    with turn, budget:
+        selected_before = getattr(session_state, "selected_idea", None)
+
+        with tracing.span("context"):
+            context = render_context(session_state.conversation, "manager", session_state)
+
+        reply = None
+        with tracing.span("route", speculative=bool(speculative and not stream)) as route_span:
+            if speculative and not stream:
+                chosen_agent, reply = speculative_route_and_dispatch(user_input, context, session_state)
+            else:
+                chosen_agent = route_query(user_input, context, getattr(session_state, "last_agent", None))
+            route_span.set(agent=chosen_agent)
+
+        agent_span = tracing.open_span(f"agent.{chosen_agent}", speculated=reply is not None)
+        if reply is None:
+            agents = router.split_labels(chosen_agent)
+            if len(agents) > 1:
+                reply = dispatch_many(agents, user_input, session_state, stream=stream)
+            else:
+                reply = dispatch(chosen_agent, user_input, session_state, stream=stream)
+
+        def finish_turn(full_reply):
+            agent_span.finish(response_chars=len(full_reply))
+            with tracing.span("memory"):
+                update_memory(session_state, user_input, full_reply, chosen_agent)
+                conversation_log.save_turn(session_state)
+            prefetch.on_selection(session_state, selected_before)
+            turn.finish(agent=chosen_agent, user_chars=len(user_input), response_chars=len(full_reply))
+            budget.end()
+            session_state.last_turn_id = turn.turn_id
+
+        if stream:
+            return finalize_stream(_failing_turn(as_stream(reply), turn, budget), finish_turn), chosen_agent
+
+        finish_turn(reply)
+        return reply, chosen_agent
+
+
+def _failing_turn(chunks, turn, budget):
+    """
+    Pass a streamed reply through; if it raises or the consumer closes it
+    early (GeneratorExit), finish the turn and release its budget.
+    """
+    try:
+        yield from chunks
+    except BaseException as exc:  # GeneratorExit too: the consumer stopped reading
+        turn.finish(error=type(exc).__name__)
+        budget.end()
+        raise
+
 
-    chosen_agent = decide_agent(user_input, context)
+async def handle_query_async(user_input, session_state):
+    """
+    handle_query for asyncio callers: the same routing, agents and memory
+    updates, awaiting model calls instead of blocking a thread, so one event
+    loop can serve many conversations. Replies are returned whole.
+    """
+    if getattr(session_state, "session_id", None) is None:
+        session_state.session_id = new_session_id()
+
+    turn = tracing.start_turn(session_id=session_state.session_id, stream=False, asynchronous=True)
+    budget = model_policy.start_turn()
+    with turn, budget:
+        selected_before = getattr(session_state, "selected_idea", None)
+
+        with tracing.span("context"):
+            context = render_context(session_state.conversation, "manager", session_state)
+
+        with tracing.span("route") as route_span:
+            chosen_agent = await route_query_async(user_input, context, getattr(session_state, "last_agent", None))
+            route_span.set(agent=chosen_agent)
+
+        with tracing.span(f"agent.{chosen_agent}") as agent_span:
+            agents = router.split_labels(chosen_agent)
+            if len(agents) > 1:
+                reply = await dispatch_many_async(agents, user_input, session_state)
+            else:
+                reply = await dispatch_async(chosen_agent, user_input, session_state)
+            agent_span.set(response_chars=len(reply))
+
+        with tracing.span("memory"):
+            update_memory(session_state, user_input, reply, chosen_agent)
+            await asyncio.to_thread(conversation_log.save_turn, session_state)  # file I/O, off the event loop
+        prefetch.on_selection(session_state, selected_before)
+        turn.finish(agent=chosen_agent, user_chars=len(user_input), response_chars=len(reply))
+        budget.end()
+        session_state.last_turn_id = turn.turn_id
+        return reply, chosen_agent
+
+
+def dispatch(chosen_agent, user_input, session_state, stream=False):
+    """Run the chosen agent (or canned reply) against the session and return its reply."""
     reply = "🤖 I’m not sure which agent fits this question yet."
 
     # -------------------------------
@@ -128,10 +356,11 @@ def handle_query(user_input, session_state):
     # 💡 IDEATION AGENT (Axe 1)
     # -------------------------------
     elif chosen_agent == "ideation":
-        reply, _ = run_ideation_agent(
+        reply, _ = get_agent("ideation")(
             user_input,
             chat_history=session_state.conversation,
-            session_state=session_state
+            session_state=session_state,
+            stream=stream,
         )
 
     # -------------------------------
@@ -139,19 +368,23 @@ def handle_query(user_input, session_state):
     # -------------------------------
     elif chosen_agent == "business":
         selected_idea = getattr(session_state, "selected_idea", None)
-        reply, _ = run_business_agent(
+        reply, _ = get_agent("business")(
             user_input,
             chat_history=session_state.conversation,
-            selected_idea=selected_idea
+            selected_idea=selected_idea,
+            stream=stream,
+            session_state=session_state,
         )
 
     # -------------------------------
     # ⚖️ LEGAL AGENT (Axe 6)
     # -------------------------------
     elif chosen_agent == "legal":
-        reply, _ = run_legal_agent(
+        reply, _ = get_agent("legal")(
             user_input,
-            chat_history=session_state.conversation
+            chat_history=session_state.conversation,
+            stream=stream,
+            session_state=session_state,
         )
 
     # -------------------------------
@@ -165,14 +398,109 @@ def handle_query(user_input, session_state):
             "Please ask something related to one of these."
         )
 
-    # -------------------------------
-    # 🧠 MEMORY UPDATE
-    # -------------------------------
-    session_state.conversation.append({"role": "user", "content": user_input})
-    session_state.conversation.append(
-        {"role": "assistant", "content": f"({chosen_agent.capitalize()} Agent) {reply}"}
-        if chosen_agent != "none"
-        else {"role": "assistant", "content": reply}
+    return reply
+
+
+async def dispatch_async(chosen_agent, user_input, session_state):
+    """dispatch for asyncio callers; canned replies need no model call and come from dispatch."""
+    if chosen_agent not in AGENT_REGISTRY:
+        return dispatch(chosen_agent, user_input, session_state)
+    kwargs = {"chat_history": session_state.conversation, "session_state": session_state}
+    if chosen_agent == "business":
+        kwargs["selected_idea"] = getattr(session_state, "selected_idea", None)
+    reply, _ = await get_agent(chosen_agent, asynchronous=True)(user_input, **kwargs)
+    return reply
+
+
+# -------------------------------
+# 🔀 MULTI-AGENT FAN-OUT
+# -------------------------------
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+
+
+def get_fanout_executor():
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout-agent")
+    return _fanout_executor
+
+
+def _run_isolated(agent, user_input, scratch):
+    with tracing.span(f"fanout.{agent}"):
+        return scratch.run(dispatch, agent, user_input, scratch)
+
+
+def dispatch_many(agents, user_input, session_state, stream=False):
+    """
+    Run several agents concurrently, each against its own scratch copy of
+    the session, and merge their replies into one answer with a section per
+    agent. Latency is that of the slowest agent. Each agent is given only
+    the clauses meant for it. Scratch changes (selected idea, system notes)
+    are committed back in agent order.
+    """
+    clauses = router.get_local_router().split_clauses(user_input, agents)
+    scratches = [speculation.SpeculativeState(session_state) for _ in agents]
+    futures = [
+        # copy_context() so each agent's spans attach to this turn.
+        get_fanout_executor().submit(contextvars.copy_context().run, _run_isolated, agent, clauses[agent], scratch)
+        for agent, scratch in zip(agents, scratches)
+    ]
+
+    def sections():
+        for i, (agent, scratch, future) in enumerate(zip(agents, scratches, futures)):
+            try:
+                reply = future.result()
+                scratch.commit(session_state)
+            except Exception as exc:
+                reply = exc
+            yield _fanout_section(i, agent, reply)
+
+    if stream:
+        return sections()
+    return "".join(sections())
+
+
+async def dispatch_many_async(agents, user_input, session_state):
+    """dispatch_many for asyncio callers: the agents run as concurrent tasks."""
+    clauses = router.get_local_router().split_clauses(user_input, agents)
+    scratches = [speculation.SpeculativeState(session_state) for _ in agents]
+    replies = await asyncio.gather(
+        *(scratch.run_async(dispatch_async, agent, clauses[agent], scratch) for agent, scratch in zip(agents, scratches)),
+        return_exceptions=True,
     )
+    parts = []
+    for i, (agent, scratch, reply) in enumerate(zip(agents, scratches, replies)):
+        if not isinstance(reply, BaseException):
+            await asyncio.to_thread(scratch.commit, session_state)  # applies deferred store writes
+        parts.append(_fanout_section(i, agent, reply))
+    return "".join(parts)
+
 
-    return reply, chosen_agent
+def _fanout_section(i, agent, reply):
+    if isinstance(reply, BaseException):
+        # One failing agent should not sink the others' answers.
+        reply = f"⚠️ This part could not be answered right now ({type(reply).__name__})."
+    return ("\n\n" if i else "") + f"### {AGENT_TITLES[agent]}\n\n{reply}"
+
+
+# -------------------------------
+# 🧠 MEMORY UPDATE
+# -------------------------------
+def update_memory(session_state, user_input, reply, chosen_agent):
+    """Append the finished turn to the shared conversation."""
+    session_state.conversation.append({"role": "user", "content": user_input})
+    agents = router.split_labels(chosen_agent)
+    if chosen_agent == "none":
+        content = reply
+    elif len(agents) > 1:
+        content = f"({' + '.join(agent.capitalize() for agent in agents)} Agents) {reply}"
+    else:
+        content = f"({chosen_agent.capitalize()} Agent) {reply}"
+    session_state.conversation.append({"role": "assistant", "content": content})
+    # Sticky routing needs a single agent; the combined label stays in the trace.
+    session_state.last_agent = agents[-1]
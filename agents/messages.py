@@ -0,0 +1,193 @@
+# agents/messages.py
+
+import itertools
+
+from agents.tracing import estimate_tokens
+
+_ids = itertools.count(1)
+
+LANGCHAIN_TYPES = {"system": "SystemMessage", "user": "HumanMessage", "assistant": "AIMessage"}
+
+
+def get_role_and_content(msg):
+    """Normalize message structure between Message, dict and LangChain types."""
+    if isinstance(msg, Message):
+        return msg.role, msg.content
+    if hasattr(msg, "type") and hasattr(msg, "content"):
+        role = "user" if msg.type == "human" else "assistant"
+        content = msg.content
+    elif isinstance(msg, dict):
+        role = msg.get("role", "assistant")
+        content = msg.get("content", "")
+    else:
+        role, content = "assistant", str(msg)
+    return role, content
+
+
+# --------------------------------
+# ✉️ MESSAGE
+# --------------------------------
+class Message:
+    """
+    One conversation message. Views agents need every turn — the compacted
+    text, its token estimate, role-prefixed lines, the summary line and the
+    LangChain object — are computed on first use and kept on the message.
+
+    Reads like the dicts it replaces (msg["content"], msg.get("role")) and
+    unpacks like a (role, content) pair.
+    """
+
+    __slots__ = ("id", "role", "content", "_compacted", "_tokens", "_line", "_cap_line", "_summary", "_langchain")
+
+    def __init__(self, role, content, id=None):
+        self.id = next(_ids) if id is None else id
+        self.role = role
+        self.content = content
+        self._compacted = self._tokens = self._line = self._cap_line = self._summary = self._langchain = None
+
+    @classmethod
+    def of(cls, msg):
+        """msg as a Message (returned unchanged if it already is one)."""
+        if isinstance(msg, cls):
+            return msg
+        return cls(*get_role_and_content(msg))
+
+    # ---------- dict / pair compatibility ----------
+    def __getitem__(self, key):
+        if key in ("role", "content"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in ("role", "content") else default
+
+    def __iter__(self):
+        yield self.role
+        yield self.content
+
+    def __eq__(self, other):
+        if isinstance(other, Message):
+            return (self.role, self.content) == (other.role, other.content)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"Message({self.role!r}, {self.content[:40]!r}{'…' if len(self.content) > 40 else ''})"
+
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+    # ---------- cached views ----------
+    @property
+    def compacted(self):
+        """Content with large artifacts replaced by a short reference (see context.compact)."""
+        if self._compacted is None:
+            from agents.context import compact
+
+            self._compacted = compact(self.content)
+        return self._compacted
+
+    @property
+    def tokens(self):
+        """Estimated context cost of the compacted message, role prefix included."""
+        if self._tokens is None:
+            self._tokens = estimate_tokens(self.compacted) + 2
+        return self._tokens
+
+    def line(self, capitalize=False):
+        """'role: compacted content', as used in text prompts."""
+        if capitalize:
+            if self._cap_line is None:
+                self._cap_line = f"{self.role.capitalize()}: {self.compacted}"
+            return self._cap_line
+        if self._line is None:
+            self._line = f"{self.role}: {self.compacted}"
+        return self._line
+
+    @property
+    def summary(self):
+        if self._summary is None:
+            from agents.context import summary_line
+
+            self._summary = summary_line(self.role, self.content)
+        return self._summary
+
+    def as_langchain(self):
+        """LangChain form of the message (None for roles LangChain has no type for)."""
+        if self._langchain is None and self.role in LANGCHAIN_TYPES:
+            from langchain import schema
+
+            self._langchain = getattr(schema, LANGCHAIN_TYPES[self.role])(content=self.content)
+        return self._langchain
+
+
+# --------------------------------
+# 💬 CONVERSATION
+# --------------------------------
+class Conversation(list):
+    """
+    The shared history: a list whose items are always Messages. Dicts and
+    LangChain objects are converted once on the way in, so agents reading
+    the history never re-normalize it.
+
+    A resumed conversation may hold only its newest messages: base is the
+    absolute position of the first one held, and log (a ConversationLog)
+    serves the older ones on demand. saved is how many messages (absolute)
+    this conversation has already written to its log.
+    """
+
+    __slots__ = ("base", "log", "saved")
+
+    def __init__(self, messages=(), base=None, log=None, saved=None):
+        super().__init__(Message.of(msg) for msg in messages)
+        self.base = getattr(messages, "base", 0) if base is None else base
+        self.log = getattr(messages, "log", None) if log is None else log
+        self.saved = getattr(messages, "saved", self.base) if saved is None else saved
+
+    @property
+    def total(self):
+        """Length of the whole history, including messages not loaded."""
+        return self.base + len(self)
+
+    def between(self, start, stop):
+        """Messages at absolute positions start..stop-1, reading unloaded ones from the log."""
+        older = []
+        if start < self.base and self.log is not None:
+            older = self.log.read(start, min(stop, self.base))
+        return older + self[max(start - self.base, 0):max(stop - self.base, 0)]
+
+    def load_older(self, count):
+        """Page in up to count older messages from the log; returns how many were loaded."""
+        if not self.base or self.log is None:
+            return 0
+        start = max(self.base - count, 0)
+        older = self.log.read(start, self.base)
+        super().__setitem__(slice(0, 0), older)
+        self.base = start
+        return len(older)
+
+    def append(self, msg):
+        super().append(Message.of(msg))
+
+    def extend(self, messages):
+        super().extend(Message.of(msg) for msg in messages)
+
+    def insert(self, index, msg):
+        super().insert(index, Message.of(msg))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [Message.of(msg) for msg in value]
+        else:
+            value = Message.of(value)
+        super().__setitem__(index, value)
+
+    def __iadd__(self, messages):
+        self.extend(messages)
+        return self
+
+    def to_dicts(self):
+        return [msg.to_dict() for msg in self]
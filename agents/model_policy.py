@@ -0,0 +1,230 @@
+# agents/model_policy.py
+
+import contextvars
+import os
+import threading
+import time
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+# Heaviest first. Classification always runs on the last (lightest) tier.
+TIERS = ("gemini-2.5-flash", "gemini-2.5-flash-lite")
+LIGHTEST = TIERS[-1]
+
+# USD per million (input, output) tokens, used for the cost budget.
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# Per-turn budgets; 0 (the default) disables one.
+TURN_LATENCY_BUDGET_MS = float(os.getenv("TURN_LATENCY_BUDGET_MS", "0"))
+TURN_COST_BUDGET_USD = float(os.getenv("TURN_COST_BUDGET_USD", "0"))
+
+# Latency priors until calls have been observed: (ms per call, ms per output token).
+PRIORS = {
+    "gemini-2.5-flash": (900.0, 12.0),
+    "gemini-2.5-flash-lite": (450.0, 5.0),
+}
+EWMA_ALPHA = 0.2
+# A tier that is no longer picked gets no new samples, so its estimate drifts
+# back to the prior with this half-life instead of locking it out for good.
+RECOVERY_HALF_LIFE_S = 300.0
+SHORT_CALL_TOKENS = 64  # replies this short mostly measure per-call overhead
+SHORT_OUTPUT_FACTOR = 0.5  # degraded replies aim for half the usual length
+
+_budget = contextvars.ContextVar("turn_budget", default=None)
+
+
+# --------------------------------
+# 📈 OBSERVED LATENCIES
+# --------------------------------
+class LatencyModel:
+    """
+    Per-model EWMA estimates of per-call overhead and per-output-token time,
+    fed from every completed model call: latency ≈ base + per_token × tokens.
+    """
+
+    def __init__(self, priors=PRIORS, alpha=EWMA_ALPHA, half_life_s=RECOVERY_HALF_LIFE_S):
+        self.alpha = alpha
+        self.half_life_s = half_life_s
+        self.priors = dict(priors)
+        self._lock = threading.Lock()
+        self._base = {model: base for model, (base, _) in priors.items()}
+        self._per_token = {model: per_token for model, (_, per_token) in priors.items()}
+        self._calls = {}
+        self._observed_at = {}
+
+    def observe(self, model_name, wall_ms, response_tokens):
+        with self._lock:
+            base = self._base.get(model_name, wall_ms)
+            per_token = self._per_token.get(model_name, 0.0)
+            if response_tokens <= SHORT_CALL_TOKENS:
+                base += self.alpha * (wall_ms - per_token * response_tokens - base)
+                self._base[model_name] = max(base, 0.0)
+            else:
+                sample = max(wall_ms - base, 0.0) / response_tokens
+                self._per_token[model_name] = per_token + self.alpha * (sample - per_token)
+            self._calls[model_name] = self._calls.get(model_name, 0) + 1
+            self._observed_at[model_name] = time.monotonic()
+
+    def predict_ms(self, model_name, output_tokens):
+        with self._lock:
+            estimate = self._base.get(model_name, 0.0) + self._per_token.get(model_name, 0.0) * output_tokens
+            prior = self.priors.get(model_name)
+            observed_at = self._observed_at.get(model_name)
+        if prior is None or observed_at is None:
+            return estimate
+        weight = 0.5 ** ((time.monotonic() - observed_at) / self.half_life_s)
+        return prior[0] + prior[1] * output_tokens + weight * (estimate - prior[0] - prior[1] * output_tokens)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                model: {
+                    "base_ms": round(self._base[model], 1),
+                    "ms_per_token": round(self._per_token.get(model, 0.0), 2),
+                    "calls": self._calls.get(model, 0),
+                }
+                for model in self._base
+            }
+
+
+latencies = LatencyModel()
+
+
+def estimate_cost(model_name, prompt_tokens, output_tokens):
+    price_in, price_out = MODEL_PRICES.get(model_name, MODEL_PRICES[TIERS[0]])
+    return (prompt_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+# --------------------------------
+# ⏱️ PER-TURN BUDGET
+# --------------------------------
+class TurnBudget:
+    """Time and money left for the current turn; shared by every call it makes."""
+
+    def __init__(self, latency_ms=TURN_LATENCY_BUDGET_MS, cost_usd=TURN_COST_BUDGET_USD):
+        self.deadline = time.perf_counter() + latency_ms / 1000 if latency_ms else None
+        self.cost_usd = cost_usd or None
+        self.spent_usd = 0.0
+        self._lock = threading.Lock()
+
+    def remaining_ms(self):
+        return None if self.deadline is None else (self.deadline - time.perf_counter()) * 1000
+
+    def remaining_usd(self):
+        with self._lock:
+            return None if self.cost_usd is None else self.cost_usd - self.spent_usd
+
+    def charge(self, usd):
+        with self._lock:
+            self.spent_usd += usd
+
+    def end(self):
+        """Stop applying this budget to calls made from the current context."""
+        token, self._token = getattr(self, "_token", None), None
+        if token is None:
+            return
+        try:
+            _budget.reset(token)
+        except ValueError:
+            # Ended from a different context (e.g. after a stream was consumed elsewhere).
+            _budget.set(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.end()
+        return False
+
+
+def start_turn(latency_ms=TURN_LATENCY_BUDGET_MS, cost_usd=TURN_COST_BUDGET_USD):
+    """Give the current turn (and anything it fans out to) a fresh budget; end() it when the turn is over."""
+    budget = TurnBudget(latency_ms, cost_usd)
+    budget._token = _budget.set(budget)
+    return budget
+
+
+def current_budget():
+    return _budget.get()
+
+
+# --------------------------------
+# 🎚️ TIER SELECTION
+# --------------------------------
+class Choice:
+    __slots__ = ("model", "max_tokens", "degraded")
+
+    def __init__(self, model, max_tokens=None, degraded=False):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.degraded = degraded
+
+    def brevity(self):
+        """Prompt line asking for the shorter output spec ("" when not degraded)."""
+        if not self.max_tokens:
+            return ""
+        words = int(self.max_tokens * 0.75)  # ~0.75 words per token
+        return f"Keep the whole answer under {words} words; prioritise the essentials."
+
+    def apply(self, prompt):
+        """prompt with the brevity line appended when degraded."""
+        line = self.brevity()
+        return f"{prompt.rstrip()}\n\n{line}\n" if line else prompt
+
+    def __repr__(self):
+        return f"Choice({self.model!r}, max_tokens={self.max_tokens}, degraded={self.degraded})"
+
+
+_stats_lock = threading.Lock()
+_decisions = {"default": 0, "lighter_tier": 0, "shorter_output": 0}
+
+
+def _count(outcome):
+    with _stats_lock:
+        _decisions[outcome] += 1
+
+
+def choose(default_model, prompt_tokens, output_tokens):
+    """
+    Model (and output spec) for a generation expected to produce about
+    output_tokens. Keeps default_model while the prediction fits the turn's
+    remaining time and money; otherwise moves down the tiers, then asks the
+    lightest tier for a shorter answer.
+    """
+    budget = _budget.get()
+    if budget is None:
+        return Choice(default_model)
+    remaining_ms = budget.remaining_ms()
+    remaining_usd = budget.remaining_usd()
+
+    def fits(model, tokens):
+        if remaining_ms is not None and latencies.predict_ms(model, tokens) > remaining_ms:
+            return False
+        return remaining_usd is None or estimate_cost(model, prompt_tokens, tokens) <= remaining_usd
+
+    start = TIERS.index(default_model) if default_model in TIERS else len(TIERS) - 1
+    for model in TIERS[start:]:
+        if fits(model, output_tokens):
+            _count("default" if model == default_model else "lighter_tier")
+            return Choice(model, degraded=model != default_model)
+    _count("shorter_output")
+    return Choice(LIGHTEST, max_tokens=max(int(output_tokens * SHORT_OUTPUT_FACTOR), 1), degraded=True)
+
+
+def observe(model_name, wall_ms, prompt_tokens, response_tokens):
+    """Record a finished call: latency estimates and the current turn's spend."""
+    latencies.observe(model_name, wall_ms, response_tokens)
+    budget = _budget.get()
+    if budget is not None:
+        budget.charge(estimate_cost(model_name, prompt_tokens, response_tokens))
+
+
+def snapshot():
+    with _stats_lock:
+        decisions = dict(_decisions)
+    return {"models": latencies.snapshot(), "decisions": decisions}
@@ -0,0 +1,200 @@
+# agents/prefetch.py
+
+import asyncio
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+
+from agents import tracing
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+# Opt-in: start the business model and legal checklist as soon as an idea is selected.
+PREFETCH_ON_SELECT = os.getenv("PREFETCH_ON_SELECT", "0") == "1"
+# Per-process budget: prefetches share this small pool and never take workers from live turns.
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_MAX_SESSIONS = int(os.getenv("PREFETCH_MAX_SESSIONS", "256"))
+# How long a live request waits for a prefetch that is already running.
+PREFETCH_WAIT_S = float(os.getenv("PREFETCH_WAIT_S", "60"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+    return _executor
+
+
+# --------------------------------
+# 📦 JOBS
+# --------------------------------
+def _business_model(session_id, idea):
+    from agents.business_agent import generate_business_model
+
+    # The artifact store is the hand-off: the live request finds this version there.
+    return generate_business_model(idea, [], session_id=session_id)
+
+
+def _legal_checklist(session_id, idea):
+    from agents.legal_agent import legal_checklist
+
+    return legal_checklist(idea)
+
+
+JOBS = {"business": _business_model, "legal": _legal_checklist}
+
+
+# --------------------------------
+# 🗓️ SCHEDULER
+# --------------------------------
+class Prefetcher:
+    """
+    Background generations for the idea a session has just selected. One
+    selection per session is tracked; selecting another idea cancels the
+    queued work for the previous one and drops its results.
+    """
+
+    def __init__(self, max_sessions=PREFETCH_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> (idea, {kind: Future})
+        self.scheduled = 0
+        self.served = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def schedule(self, session_id, idea, kinds=tuple(JOBS)):
+        """Start prefetching kinds for idea, replacing any other selection."""
+        with self._lock:
+            current = self._sessions.get(session_id)
+            if current is not None and current[0] == idea:
+                return
+            if current is not None:
+                self._cancel(current)
+            futures = {}
+            for kind in kinds:
+                # Fresh context: background spans must not count towards the turn that scheduled them.
+                futures[kind] = get_executor().submit(
+                    contextvars.Context().run, self._run, kind, session_id, idea
+                )
+            self._sessions[session_id] = (idea, futures)
+            self._sessions.move_to_end(session_id)
+            self.scheduled += len(futures)
+            while len(self._sessions) > self.max_sessions:
+                self._cancel(self._sessions.popitem(last=False)[1])
+
+    def cancel(self, session_id):
+        with self._lock:
+            current = self._sessions.pop(session_id, None)
+            if current is not None:
+                self._cancel(current)
+
+    def _cancel(self, entry):
+        # Running jobs finish, but nothing will claim their results.
+        for future in entry[1].values():
+            if future.cancel():
+                self.cancelled += 1
+
+    def _run(self, kind, session_id, idea):
+        with tracing.span(f"prefetch.{kind}"):
+            return JOBS[kind](session_id, idea)
+
+    def _take(self, session_id, kind, idea):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] != idea or kind not in entry[1]:
+                return None
+            return entry[1].pop(kind)
+
+    def _record(self, served):
+        with self._lock:
+            if served:
+                self.served += 1
+            else:
+                self.failed += 1
+
+    def result(self, session_id, kind, idea, timeout=PREFETCH_WAIT_S):
+        """
+        The prefetched kind for idea, waiting for it if it is still running.
+        None if nothing matching was prefetched or the job failed.
+        """
+        future = self._take(session_id, kind, idea)
+        if future is None:
+            return None
+        try:
+            reply = future.result(timeout=timeout)
+        except Exception:
+            self._record(served=False)
+            return None
+        self._record(served=True)
+        return reply
+
+    async def result_async(self, session_id, kind, idea, timeout=PREFETCH_WAIT_S):
+        """result() for event-loop callers."""
+        future = self._take(session_id, kind, idea)
+        if future is None:
+            return None
+        try:
+            reply = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except Exception:
+            self._record(served=False)
+            return None
+        self._record(served=True)
+        return reply
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "scheduled": self.scheduled,
+                "served": self.served,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+            }
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+    return _prefetcher
+
+
+def on_selection(session_state, previous_idea):
+    """Prefetch for a newly selected idea (no-op unless PREFETCH_ON_SELECT)."""
+    idea = getattr(session_state, "selected_idea", None)
+    if not PREFETCH_ON_SELECT or idea == previous_idea:
+        return
+    session_id = getattr(session_state, "session_id", None)
+    if idea:
+        get_prefetcher().schedule(session_id, idea)
+    else:
+        get_prefetcher().cancel(session_id)
+
+
+def claim(session_state, kind, idea):
+    """Prefetched result for this session's idea, or None (always None when disabled)."""
+    if not PREFETCH_ON_SELECT or not idea:
+        return None
+    return get_prefetcher().result(getattr(session_state, "session_id", None), kind, idea)
+
+
+async def claim_async(session_state, kind, idea):
+    if not PREFETCH_ON_SELECT or not idea:
+        return None
+    return await get_prefetcher().result_async(getattr(session_state, "session_id", None), kind, idea)
@@ -0,0 +1,255 @@
+# agents/router.py
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, deque
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "router_examples.jsonl")
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "router_model.json")
+
+LOCAL_LABELS = ("ideation", "business", "legal")
+CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_ROUTER_THRESHOLD", "0.85"))
+STICKY_MAX_WORDS = 8
+# A follow-up's words after "why" / "tell me more" / ... must lean this much
+# towards an agent to stay sticky (unknown words alone keep it sticky).
+STICKY_MIN_CONFIDENCE = 0.5
+
+# Cross-domain requests route to several agents, joined as e.g. "business+legal".
+MULTI_SEPARATOR = "+"
+CLAUSE_SPLIT = re.compile(r"\s*(?:[;.?!]\s+|\band then\b|\band also\b|\band\b|\balso\b|\bplus\b|\bas well as\b)\s*", re.IGNORECASE)
+MIN_CLAUSE_WORDS = 3
+
+STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "our", "you", "your", "it", "is", "are",
+    "do", "does", "to", "of", "in", "on", "for", "and", "or", "with", "can", "could",
+    "should", "what", "how", "some", "this", "that", "be", "please", "give", "need",
+}
+
+# Anything that smells like distress or unsafe content always goes to the LLM
+# router, which owns the Support / Unsafe guardrails.
+GUARD_PATTERN = re.compile(
+    r"\b(sad|depress\w*|anxi\w*|stress\w*|burn(?:ed|t)?\s*out|burnout|suicid\w*|hopeless|"
+    r"lonely|overwhelm\w*|kill\w*|weapon\w*|gun|drugs?|porn\w*|sex\w*|nude|hate|"
+    r"scam\w*|hack\w*|gambl\w*|violen\w*)\b"
+)
+
+CONTINUATION_PATTERN = re.compile(
+    r"^(more|another|again|why|how come|and|also|ok|okay|yes|sure|continue|go on|expand|"
+    r"elaborate|explain|details?|tell me more|what about|how about|the (first|second|third|last)|"
+    r"(idea|option|number)\s*\d+|that one|this one|shorter|longer|simplify|rewrite|make it)\b"
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+
+
+# --------------------------------
+# 🔤 FEATURES
+# --------------------------------
+def tokenize(text):
+    """Lowercased unigram (minus stopwords) and bigram features."""
+    words = TOKEN_PATTERN.findall(text.lower())
+    features = [w for w in words if w not in STOPWORDS]
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return features
+
+
+def split_labels(label):
+    """Agents for a (possibly multi-agent) label, e.g. "business+legal" -> ["business", "legal"]."""
+    return label.split(MULTI_SEPARATOR)
+
+
+def join_labels(labels):
+    """Canonical multi-agent label: agents in LOCAL_LABELS order, no repeats."""
+    return MULTI_SEPARATOR.join(label for label in LOCAL_LABELS if label in labels)
+
+
+# --------------------------------
+# 🏋️ OFFLINE TRAINING
+# --------------------------------
+def load_examples(path=EXAMPLES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def train(examples):
+    """Fit a multinomial Naive Bayes model (Laplace smoothing) on labeled examples."""
+    doc_counts = Counter(ex["label"] for ex in examples)
+    token_counts = {label: Counter() for label in doc_counts}
+    for ex in examples:
+        token_counts[ex["label"]].update(tokenize(ex["text"]))
+
+    vocab = set().union(*token_counts.values())
+    total_docs = sum(doc_counts.values())
+    model = {"version": 1, "labels": sorted(doc_counts), "priors": {}, "loglik": {}, "unk": {}}
+    for label, counts in token_counts.items():
+        denom = sum(counts.values()) + len(vocab)
+        model["priors"][label] = math.log(doc_counts[label] / total_docs)
+        model["loglik"][label] = {tok: math.log((n + 1) / denom) for tok, n in counts.items()}
+        model["unk"][label] = math.log(1 / denom)
+    return model
+
+
+def save_model(model, path=MODEL_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=1, sort_keys=True)
+
+
+# --------------------------------
+# 🧠 LOCAL CLASSIFIER
+# --------------------------------
+class LocalRouter:
+    """Naive Bayes intent classifier with sticky routing for follow-up turns."""
+
+    def __init__(self, model):
+        self.model = model
+        self.vocab = set().union(*(set(v) for v in model["loglik"].values()))
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return cls(json.load(f))
+        return cls(train(load_examples()))
+
+    def predict(self, text):
+        """Return (label, confidence) from the posterior over all trained labels."""
+        features = [tok for tok in tokenize(text) if tok in self.vocab]
+        if not features:
+            return "none", 0.0
+
+        scores = {}
+        for label in self.model["labels"]:
+            loglik = self.model["loglik"][label]
+            unk = self.model["unk"][label]
+            scores[label] = self.model["priors"][label] + sum(loglik.get(tok, unk) for tok in features)
+
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(s - scores[best]) for s in scores.values())
+        return best, 1.0 / norm
+
+    def predict_multi(self, text):
+        """
+        Multi-agent label when separate clauses confidently belong to
+        different agents ("build a business model and list the legal
+        risks"), else None.
+        """
+        clauses = [c for c in CLAUSE_SPLIT.split(text) if len(c.split()) >= MIN_CLAUSE_WORDS]
+        if len(clauses) < 2:
+            return None
+        labels = set()
+        for clause in clauses:
+            label, confidence = self.predict(clause)
+            if label in LOCAL_LABELS and confidence >= CONFIDENCE_THRESHOLD:
+                labels.add(label)
+        return join_labels(labels) if len(labels) > 1 else None
+
+    def split_clauses(self, text, agents):
+        """
+        The part of text meant for each of agents: the clauses classified
+        as that agent, or the whole text when none were.
+        """
+        parts = {agent: [] for agent in agents}
+        for clause in CLAUSE_SPLIT.split(text):
+            if len(clause.split()) < MIN_CLAUSE_WORDS:
+                continue
+            label, confidence = self.predict(clause.lower())
+            if label in parts and confidence >= CONFIDENCE_THRESHOLD:
+                parts[label].append(clause)
+        return {agent: "; ".join(clauses) if clauses else text for agent, clauses in parts.items()}
+
+    def route(self, user_input, last_agent=None):
+        """
+        Returns (label, reason) when confident, or (None, reason) when the
+        LLM router should decide.
+        """
+        text = user_input.strip().lower()
+        if not text or GUARD_PATTERN.search(text):
+            return None, "guard"
+
+        multi = self.predict_multi(text)
+        if multi is not None:
+            return multi, "multi"
+
+        label, confidence = self.predict(text)
+
+        # Short continuation of the agent that just answered → stay with it,
+        # unless the classifier is confident the topic switched.
+        continuation = CONTINUATION_PATTERN.match(text)
+        is_continuation = len(text.split()) <= STICKY_MAX_WORDS and continuation
+        if last_agent in LOCAL_LABELS and is_continuation:
+            # "explain quantum physics", "why is the sky blue": continuations in
+            # form only. The LLM router handles them (and anything out of scope).
+            rest_label, rest_confidence = self.predict(text[continuation.end():])
+            if (label not in LOCAL_LABELS and confidence >= CONFIDENCE_THRESHOLD) or (
+                rest_confidence and (rest_label not in LOCAL_LABELS or rest_confidence < STICKY_MIN_CONFIDENCE)
+            ):
+                return None, "off_topic"
+            if not (label != last_agent and confidence >= CONFIDENCE_THRESHOLD):
+                return last_agent, "sticky"
+
+        if label in LOCAL_LABELS and confidence >= CONFIDENCE_THRESHOLD:
+            return label, "local"
+        return None, "low_confidence"
+
+
+# --------------------------------
+# 📊 ROUTING STATS
+# --------------------------------
+class RouterStats:
+    """Thread-safe counters for local hits vs. LLM fallbacks."""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.llm_latencies_ms = deque(maxlen=window)
+
+    def record(self, reason, llm_latency_ms=None):
+        with self._lock:
+            self.counts[reason] += 1
+            if llm_latency_ms is not None:
+                self.llm_latencies_ms.append(llm_latency_ms)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+            latencies = sorted(self.llm_latencies_ms)
+        hits = counts.get("local", 0) + counts.get("sticky", 0) + counts.get("multi", 0)
+        total = sum(counts.values())
+        p50 = latencies[len(latencies) // 2] if latencies else None
+        return {
+            "total": total,
+            "local_hits": counts.get("local", 0),
+            "sticky_hits": counts.get("sticky", 0),
+            "multi_hits": counts.get("multi", 0),
+            "fallbacks": total - hits,
+            "hit_rate": hits / total if total else 0.0,
+            "p50_llm_routing_ms": p50,
+            "estimated_saved_ms": hits * p50 if p50 is not None else None,
+        }
+
+
+_router = None
+_router_lock = threading.Lock()
+stats = RouterStats()
+
+
+def get_local_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LocalRouter.load()
+    return _router
+
+
+if __name__ == "__main__":
+    # Offline training: python -m agents.router
+    trained = train(load_examples())
+    save_model(trained)
+    print(f"Saved router model with {len(trained['labels'])} labels to {MODEL_PATH}")
@@ -0,0 +1,391 @@
+# agents/semantic_cache.py
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from agents.router import STOPWORDS, TOKEN_PATTERN
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", os.path.join(".cache", "semantic.sqlite3"))
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.82"))
+MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_ENTRIES", "2048"))
+TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL", str(30 * 24 * 3600)))
+
+DIM = 2 ** 11               # hashed feature space
+CHAR_NGRAMS = (3, 4)        # within-word character n-grams, on top of words and bigrams
+
+# Terms that change the answer however similar the rest of the question is:
+# jurisdictions, regulations and statutes. A hit needs the same set on both
+# questions. Aliases map to one canonical spelling.
+KEY_TERM_ALIASES = {
+    "united states": "us", "usa": "us", "america": "us", "american": "us",
+    "european union": "eu", "europe": "eu", "european": "eu",
+    "united kingdom": "uk", "britain": "uk", "british": "uk", "england": "uk",
+}
+KEY_TERMS = {
+    # jurisdictions
+    "eu", "uk", "eea", "canada", "california", "new york", "delaware", "texas", "germany", "france",
+    "spain", "italy", "netherlands", "ireland", "switzerland", "india", "china", "japan", "singapore",
+    "australia", "brazil", "mexico", "uae", "morocco", "tunisia", "nigeria", "kenya", "south africa",
+    # regulations and statutes
+    "gdpr", "ccpa", "cpra", "hipaa", "coppa", "ferpa", "glba", "sox", "pci", "pci-dss", "dmca", "ada",
+    "fcra", "tcpa", "can-spam", "pipeda", "lgpd", "pdpa", "dpa", "psd2", "mica", "dsa", "dma", "ai act",
+    "eprivacy", "aml", "kyc", "sec", "finra", "fda", "ftc", "osha", "flsa",
+}
+KEY_TERM_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(t) for t in sorted({*KEY_TERMS, *KEY_TERM_ALIASES}, key=len, reverse=True)) + r")\b"
+)
+STATUTE_PATTERN = re.compile(r"\b(?:section|article|title|chapter|rule|regulation)\s+\d+[a-z]?\b|\b\d+\s*u\.?s\.?c\b")
+US_PATTERN = re.compile(r"\bU\.?S\.?(?![A-Za-z])")  # "us" in lowercase is the pronoun
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace TEXT NOT NULL,
+    context TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+"""
+
+
+# --------------------------------
+# 🔢 HASHED N-GRAM FEATURES
+# --------------------------------
+def features(text):
+    """Words (minus stopwords), word bigrams and within-word character n-grams."""
+    words = TOKEN_PATTERN.findall(text.lower())
+    content = [w for w in words if w not in STOPWORDS] or words
+    feats = list(content)
+    feats += [f"{a} {b}" for a, b in zip(content, content[1:])]
+    for word in content:
+        padded = f"<{word}>"
+        for n in CHAR_NGRAMS:
+            feats += [padded[i:i + n] for i in range(len(padded) - n + 1)]
+    return feats
+
+
+def key_terms(text):
+    """Jurisdictions, regulations and statute references named in text, canonicalized."""
+    lower = text.lower()
+    terms = {KEY_TERM_ALIASES.get(t, t) for t in KEY_TERM_PATTERN.findall(lower)}
+    terms.update(" ".join(t.split()) for t in STATUTE_PATTERN.findall(lower))
+    if US_PATTERN.search(text):
+        terms.add("us")
+    return frozenset(terms)
+
+
+def term_vector(text):
+    """Sublinear term frequencies, signed-hashed into DIM buckets (no IDF yet)."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    counts = {}
+    for feat in features(text):
+        h = zlib.crc32(feat.encode("utf-8"))
+        counts[h] = counts.get(h, 0) + 1
+    for h, count in counts.items():
+        vec[h % DIM] += (1.0 if (h >> 31) & 1 else -1.0) * (1.0 + math.log(count))
+    return vec
+
+
+# --------------------------------
+# 🧠 SEMANTIC CACHE
+# --------------------------------
+class SemanticCache:
+    """
+    Answers keyed by question meaning instead of exact text.
+
+    Questions become hashed n-gram TF-IDF vectors; a lookup is one matrix
+    product against every entry in the same (namespace, context), and the
+    best match is returned if its cosine similarity clears the threshold
+    and both questions name the same key terms (see key_terms). context
+    separates answers that depend on something outside the question
+    (e.g. the selected idea). Entries expire after ttl_seconds; past
+    max_entries the least recently used unpinned entry is evicted.
+    """
+
+    def __init__(
+        self,
+        path=SEMANTIC_CACHE_PATH,
+        threshold=SIMILARITY_THRESHOLD,
+        max_entries=MAX_ENTRIES,
+        ttl_seconds=TTL_SECONDS,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        # Row i of the arrays belongs to entry _ids[i]; only the first _n rows are live.
+        rows = self._db.execute(
+            "SELECT id, namespace, context, question, answer, pinned, hits, created_at, accessed_at "
+            "FROM entries ORDER BY id"
+        ).fetchall()
+        capacity = max(max_entries, len(rows)) + 1
+        self._n = 0
+        self._ids = []
+        self._meta = {}
+        self._terms = {}                                        # entry id -> key_terms(question)
+        self._key_codes = {}                                    # (namespace, context) -> int
+        self._codes = np.zeros(capacity, dtype=np.int32)
+        self._tf = np.zeros((capacity, DIM), dtype=np.float32)  # raw term vectors
+        self._matrix = np.zeros((capacity, DIM), dtype=np.float32)  # normalized TF-IDF rows
+        self._df = np.zeros(DIM, dtype=np.float32)
+        self._idf = np.ones(DIM, dtype=np.float32)
+        self._idf_n = 0
+
+        for row in rows:
+            entry = dict(zip(
+                ("id", "namespace", "context", "question", "answer", "pinned", "hits", "created_at", "accessed_at"),
+                row,
+            ))
+            entry["pinned"] = bool(entry["pinned"])
+            self._append(entry, term_vector(entry["question"]))
+        self._refresh_idf()
+        with self._lock:
+            self._expire(time.time())
+            self._evict()
+            self._db.commit()
+
+    def _code(self, namespace, context):
+        return self._key_codes.setdefault((namespace, context), len(self._key_codes))
+
+    def _append(self, entry, vector):
+        row = self._n
+        self._ids.append(entry["id"])
+        self._meta[entry["id"]] = entry
+        self._terms[entry["id"]] = key_terms(entry["question"])
+        self._codes[row] = self._code(entry["namespace"], entry["context"])
+        self._tf[row] = vector
+        self._df += vector != 0
+        self._matrix[row] = self._weigh(vector)
+        self._n += 1
+
+    def _weigh(self, vector):
+        weighted = vector * self._idf
+        return weighted / max(float(np.linalg.norm(weighted)), 1e-9)
+
+    def _refresh_idf(self):
+        """Recompute IDF and every row; done when the entry count has drifted ~10%."""
+        n = self._n
+        self._idf = (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+        weighted = self._tf[:n] * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        self._matrix[:n] = weighted / np.maximum(norms, 1e-9)
+        self._idf_n = n
+
+    def _best(self, question, namespace, context):
+        """(similarity, entry) of the closest entry with the same key, or (0.0, None)."""
+        code = self._key_codes.get((namespace, context))
+        if code is None or not self._n:
+            return 0.0, None
+        q = self._weigh(term_vector(question))
+        sims = self._matrix[:self._n] @ q
+        sims[self._codes[:self._n] != code] = -1.0
+        terms = key_terms(question)
+        # Best first; an entry naming other jurisdictions or statutes never answers.
+        for row in np.argsort(-sims):
+            if sims[row] < 0:
+                break
+            entry_id = self._ids[row]
+            if self._terms[entry_id] == terms:
+                return float(sims[row]), self._meta[entry_id]
+            if sims[row] < self.threshold:
+                break
+        return 0.0, None
+
+    # ---------- reads ----------
+    def lookup(self, question, namespace, context=""):
+        """Best cached entry for question as a dict with its similarity, or None."""
+        now = time.time()
+        with self._lock:
+            similarity, entry = self._best(question, namespace, context)
+            if entry is not None and not entry["pinned"] and now - entry["created_at"] > self.ttl_seconds:
+                self._remove(entry["id"])
+                self._db.commit()
+                self._stats["evictions"] += 1
+                entry = None
+            if entry is None or similarity < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            entry["hits"] += 1
+            entry["accessed_at"] = now
+            self._db.execute("UPDATE entries SET hits = hits + 1, accessed_at = ? WHERE id = ?", (now, entry["id"]))
+            self._db.commit()
+            self._stats["hits"] += 1
+            return {**entry, "similarity": similarity}
+
+    def entries(self, namespace=None, limit=50):
+        """Cached entries, pinned and most used first (for the admin CLI and sidebar)."""
+        with self._lock:
+            items = [dict(e) for e in self._meta.values() if namespace is None or e["namespace"] == namespace]
+        items.sort(key=lambda e: (not e["pinned"], -e["hits"], -e["accessed_at"]))
+        return items[:limit]
+
+    # ---------- writes ----------
+    def add(self, question, answer, namespace, context="", pinned=False):
+        """Store an answer; returns the new entry id."""
+        vector = term_vector(question)
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO entries (namespace, context, question, answer, pinned, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, context, question, answer, int(pinned), now, now),
+            )
+            entry = {
+                "id": cursor.lastrowid, "namespace": namespace, "context": context, "question": question,
+                "answer": answer, "pinned": pinned, "hits": 0, "created_at": now, "accessed_at": now,
+            }
+            if self._n == len(self._codes):
+                self._evict(room=1)
+            if self._n == len(self._codes):
+                self._grow()  # every entry is pinned
+            self._append(entry, vector)
+            if self._n > self._idf_n * 1.1 + 8 or self._n < self._idf_n * 0.9:
+                self._refresh_idf()
+            self._evict()
+            self._db.commit()
+        return entry["id"]
+
+    def _grow(self):
+        capacity = 2 * len(self._codes)
+        for name in ("_codes", "_tf", "_matrix"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self._n] = old[:self._n]
+            setattr(self, name, grown)
+
+    def _expire(self, now):
+        for entry in list(self._meta.values()):
+            if not entry["pinned"] and now - entry["created_at"] > self.ttl_seconds:
+                self._remove(entry["id"])
+                self._stats["evictions"] += 1
+
+    def _evict(self, room=0):
+        while self._n + room > self.max_entries:
+            unpinned = [e for e in self._meta.values() if not e["pinned"]]
+            if not unpinned:
+                return
+            self._remove(min(unpinned, key=lambda e: e["accessed_at"])["id"])
+            self._stats["evictions"] += 1
+
+    def _remove(self, entry_id):
+        # Swap the last live row into the freed slot.
+        row = self._ids.index(entry_id)
+        last = self._n - 1
+        self._df -= self._tf[row] != 0
+        if row != last:
+            self._ids[row] = self._ids[last]
+            self._codes[row] = self._codes[last]
+            self._tf[row] = self._tf[last]
+            self._matrix[row] = self._matrix[last]
+        self._ids.pop()
+        self._n -= 1
+        self._meta.pop(entry_id, None)
+        self._terms.pop(entry_id, None)
+        self._db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+
+    # ---------- admin ----------
+    def pin(self, entry_id, pinned=True):
+        """Pinned entries are never evicted or expired."""
+        with self._lock:
+            if entry_id not in self._meta:
+                return False
+            self._meta[entry_id]["pinned"] = pinned
+            self._db.execute("UPDATE entries SET pinned = ? WHERE id = ?", (int(pinned), entry_id))
+            self._db.commit()
+            return True
+
+    def invalidate(self, entry_id):
+        with self._lock:
+            if entry_id not in self._meta:
+                return False
+            self._remove(entry_id)
+            self._db.commit()
+            return True
+
+    def invalidate_similar(self, question, namespace, context=""):
+        """Drop every entry that would answer question; returns how many."""
+        removed = 0
+        with self._lock:
+            while True:
+                similarity, entry = self._best(question, namespace, context)
+                if entry is None or similarity < self.threshold:
+                    break
+                self._remove(entry["id"])
+                removed += 1
+            self._db.commit()
+        return removed
+
+    def clear(self, namespace=None):
+        with self._lock:
+            for entry in list(self._meta.values()):
+                if namespace is None or entry["namespace"] == namespace:
+                    self._remove(entry["id"])
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._n
+            stats["pinned"] = sum(1 for e in self._meta.values() if e["pinned"])
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    global _semantic_cache
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+
+if __name__ == "__main__":
+    # Admin: python -m agents.semantic_cache list | pin ID | unpin ID | invalidate ID | clear | stats
+    parser = argparse.ArgumentParser(description="Inspect and manage the semantic answer cache.")
+    parser.add_argument("command", choices=["list", "pin", "unpin", "invalidate", "clear", "stats"])
+    parser.add_argument("entry_id", nargs="?", type=int)
+    parser.add_argument("--namespace")
+    args = parser.parse_args()
+
+    cache = get_semantic_cache()
+    if args.command == "list":
+        for e in cache.entries(args.namespace):
+            flag = "📌" if e["pinned"] else "  "
+            print(f"{flag} {e['id']:>5}  {e['hits']:>4} hits  [{e['namespace']}:{e['context'] or '-'}]  {e['question']}")
+    elif args.command == "stats":
+        print(cache.stats())
+    elif args.command == "clear":
+        cache.clear(args.namespace)
+    elif args.entry_id is None:
+        parser.error(f"{args.command} needs an entry id")
+    else:
+        action = {"pin": cache.pin, "unpin": lambda i: cache.pin(i, False), "invalidate": cache.invalidate}
+        print("ok" if action[args.command](args.entry_id) else f"no entry {args.entry_id}")
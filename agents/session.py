@@ -0,0 +1,66 @@
+# agents/session.py
+
+import os
+import re
+
+from agents.messages import Conversation
+
+# Session ids name files (see conversation_log), so keep them path-safe.
+SESSION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def new_session_id():
+    return os.urandom(8).hex()
+
+
+class SessionState:
+    """
+    Attribute-style session state for running handle_query outside
+    Streamlit (batch runs, benchmarks, services). Mirrors the fields
+    app.py keeps in st.session_state.
+    """
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id or new_session_id()
+        self.conversation = Conversation()
+        self.selected_idea = None
+        self.last_agent = None
+
+
+# --------------------------------
+# 🗄️ SESSION STORES
+# --------------------------------
+class SessionStore:
+    """
+    Where server sessions live between requests (see server.py). Subclass
+    and override load/save to keep them elsewhere (Redis, a database, ...).
+    """
+
+    async def load(self, session_id):
+        """The stored SessionState for session_id, or None."""
+        raise NotImplementedError
+
+    async def save(self, session_state):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store; the least recently used sessions are dropped past max_sessions."""
+
+    def __init__(self, max_sessions=10_000):
+        from collections import OrderedDict
+
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    async def load(self, session_id):
+        session_state = self._sessions.get(session_id)
+        if session_state is not None:
+            self._sessions.move_to_end(session_id)
+        return session_state
+
+    async def save(self, session_state):
+        self._sessions[session_state.session_id] = session_state
+        self._sessions.move_to_end(session_state.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
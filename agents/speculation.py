@@ -0,0 +1,139 @@
+# agents/speculation.py
+
+import contextvars
+import os
+import threading
+import time
+
+from agents.messages import Conversation
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+SPECULATIVE_DISPATCH = os.getenv("SPECULATIVE_DISPATCH", "0") == "1"
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Writes buffered by the scratch run in progress (None outside one).
+_effects = contextvars.ContextVar("speculative_effects", default=None)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(
+                    max_workers=SPECULATION_WORKERS, thread_name_prefix="speculative-agent"
+                )
+    return _executor
+
+
+# --------------------------------
+# 🧪 ISOLATED SESSION STATE
+# --------------------------------
+class SpeculativeState:
+    """
+    Scratch copy of the session the speculative agent runs against, so a
+    discarded guess never touches the real conversation or selected idea.
+    """
+
+    SHARED_FIELDS = ("selected_idea", "generated_ideas", "context_summaries")
+
+    def __init__(self, session_state):
+        self._base_len = len(session_state.conversation)
+        self._effects = []
+        self.session_id = getattr(session_state, "session_id", None)
+        self.conversation = Conversation(session_state.conversation)
+        for name in self.SHARED_FIELDS:
+            if hasattr(session_state, name):
+                setattr(self, name, getattr(session_state, name))
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn with writes to shared stores held back until commit() (see defer)."""
+        token = _effects.set(self._effects)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _effects.reset(token)
+
+    async def run_async(self, fn, *args, **kwargs):
+        token = _effects.set(self._effects)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _effects.reset(token)
+
+    def commit(self, session_state):
+        """Apply whatever the agent changed back onto the real session."""
+        for name in self.SHARED_FIELDS:
+            if name in vars(self) and getattr(session_state, name, None) is not getattr(self, name):
+                setattr(session_state, name, getattr(self, name))
+        session_state.conversation.extend(self.conversation[self._base_len:])
+        effects, self._effects[:] = list(self._effects), []
+        for fn, args, kwargs in effects:
+            fn(*args, **kwargs)
+
+
+def defer(fn, *args, **kwargs):
+    """
+    Call fn now, or, inside a SpeculativeState.run, when that scratch is
+    committed. Agents route writes to shared stores (idea registry,
+    artifact store, caches) through here so a discarded guess leaves none.
+    """
+    effects = _effects.get()
+    if effects is None:
+        return fn(*args, **kwargs)
+    effects.append((fn, args, kwargs))
+
+
+def run_timed(fn, *args, **kwargs):
+    """Run fn and return (result, elapsed_ms) — used inside the worker thread."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+# --------------------------------
+# 📊 SPECULATION STATS
+# --------------------------------
+class SpeculationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.launched = 0
+        self.committed = 0
+        self.wasted = 0
+        self.cancelled_before_start = 0
+        self.saved_ms = 0.0
+
+    def record_commit(self, saved_ms):
+        with self._lock:
+            self.launched += 1
+            self.committed += 1
+            self.saved_ms += saved_ms
+
+    def record_miss(self, cancelled):
+        with self._lock:
+            self.launched += 1
+            if cancelled:
+                self.cancelled_before_start += 1
+            else:
+                self.wasted += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "launched": self.launched,
+                "committed": self.committed,
+                "wasted_calls": self.wasted,
+                "cancelled_before_start": self.cancelled_before_start,
+                "accuracy": self.committed / self.launched if self.launched else 0.0,
+                "latency_saved_ms": self.saved_ms,
+            }
+
+
+stats = SpeculationStats()
@@ -0,0 +1,30 @@
+# agents/streaming.py
+
+
+def as_stream(reply):
+    """Yield a reply that may already be a full string or an iterator of chunks."""
+    if isinstance(reply, str):
+        yield reply
+    else:
+        yield from reply
+
+
+def finalize_stream(chunks, on_complete):
+    """
+    Pass chunks through unchanged, then call on_complete(full_text) once the
+    stream is exhausted. Post-processing (memory updates, idea extraction,
+    saving artifacts) runs here so it still happens in streaming mode.
+    """
+    parts = []
+    for chunk in chunks:
+        if chunk:
+            parts.append(chunk)
+            yield chunk
+    on_complete("".join(parts).strip())
+
+
+def stream_text(response):
+    """Iterate the text of a streamed Gemini response."""
+    for chunk in response:
+        if chunk.parts:
+            yield chunk.text
@@ -0,0 +1,261 @@
+# agents/tracing.py
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# --------------------------------
+# ⚙️ CONFIGURATION
+# --------------------------------
+TRACING_ENABLED = os.getenv("TRACING", "1") == "1"
+TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(".traces", "spans.jsonl"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(5 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "5"))
+RECENT_TURNS = 50
+MAX_OPEN_TURNS = 1000
+STAGE_WINDOW = 1000
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) — no tokenizer call on the hot path."""
+    return tokens_for_chars(len(text)) if text else 0
+
+
+def tokens_for_chars(chars):
+    return (chars + 3) // 4
+
+
+# --------------------------------
+# 📏 SPANS & TURNS
+# --------------------------------
+class Span:
+    __slots__ = ("stage", "turn_id", "attrs", "start", "wall_ms", "_finished")
+
+    def __init__(self, stage, **attrs):
+        turn = _current_turn.get()
+        self.stage = stage
+        self.turn_id = turn.turn_id if turn else None
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.wall_ms = None
+        self._finished = False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, **attrs):
+        if self._finished:
+            return
+        self._finished = True
+        self.attrs.update(attrs)
+        self.wall_ms = (time.perf_counter() - self.start) * 1000
+        _collector.record_span(self)
+
+    def to_dict(self):
+        return {"type": "span", "turn_id": self.turn_id, "stage": self.stage, "wall_ms": round(self.wall_ms, 2), **self.attrs}
+
+
+class Turn:
+    """One handle_query call; spans opened while it is current are attached to it."""
+
+    def __init__(self, **attrs):
+        self.turn_id = os.urandom(6).hex()
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self._finished = False
+        self._token = _current_turn.set(self)
+        _collector.begin_turn(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A turn that raised is finished here; otherwise the caller finishes it
+        # (a streamed turn only once its stream has been consumed).
+        if exc_type is not None:
+            self.finish(error=exc_type.__name__)
+        return False
+
+    def finish(self, **attrs):
+        if self._finished:
+            return
+        self._finished = True
+        self.attrs.update(attrs)
+        wall_ms = (time.perf_counter() - self.start) * 1000
+        try:
+            _current_turn.reset(self._token)
+        except ValueError:
+            # Finished from a different context (e.g. after a stream was consumed elsewhere).
+            _current_turn.set(None)
+        _collector.record_turn(self, wall_ms)
+
+
+def start_turn(**attrs):
+    return Turn(**attrs)
+
+
+def open_span(stage, **attrs):
+    """Start a span that is finished explicitly (e.g. when a stream completes)."""
+    return Span(stage, **attrs)
+
+
+@contextmanager
+def span(stage, **attrs):
+    s = Span(stage, **attrs)
+    try:
+        yield s
+    finally:
+        s.finish()
+
+
+def trace_stream(s, chunks):
+    """
+    Pass a stream through, recording time-to-first-token and response size
+    on s. s is finished however the stream ends: with error= if it raised,
+    abandoned=True if the consumer closed it early.
+    """
+    parts = 0
+    chars = 0
+    ended = {"abandoned": True}
+    try:
+        for chunk in chunks:
+            if parts == 0:
+                s.set(ttft_ms=round((time.perf_counter() - s.start) * 1000, 2))
+            parts += 1
+            chars += len(chunk)
+            yield chunk
+        ended = {}
+    except Exception as exc:
+        ended = {"error": type(exc).__name__}
+        raise
+    finally:
+        s.finish(response_chars=chars, response_tokens=tokens_for_chars(chars), chunks=parts, **ended)
+
+
+# --------------------------------
+# 📥 COLLECTOR
+# --------------------------------
+class Collector:
+    """
+    Keeps the last turns and per-stage durations in memory and hands JSONL
+    lines to a background thread that writes a rotating file.
+    """
+
+    def __init__(self, path=TRACE_PATH, enabled=TRACING_ENABLED):
+        self.enabled = enabled
+        self.path = path
+        self._lock = threading.Lock()
+        self._turns = deque(maxlen=RECENT_TURNS)
+        self._open_turns = {}
+        self._finished = {}  # turn_id -> turn record, bounded like _open_turns
+        self._stage_ms = defaultdict(lambda: deque(maxlen=STAGE_WINDOW))
+        self._logger = None
+        self._listener = None
+
+    def _log(self, record):
+        if self._logger is None:
+            self._start_writer()
+        self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _start_writer(self):
+        # logging is imported here so tracing adds nothing to cold start.
+        import logging
+        import logging.handlers
+        import queue
+
+        with self._lock:
+            if self._logger is not None:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            q = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(q, handler)
+            self._listener.start()
+            logger = logging.getLogger("startup_ai.trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(logging.handlers.QueueHandler(q))
+            self._logger = logger
+
+    def record_span(self, s):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stage_ms[s.stage].append(s.wall_ms)
+            turn = self._open_turns.get(s.turn_id)
+            if turn is not None:
+                turn["stages"][s.stage] = round(turn["stages"].get(s.stage, 0.0) + s.wall_ms, 2)
+        self._log(s.to_dict())
+
+    def record_turn(self, turn, wall_ms):
+        if not self.enabled:
+            return
+        record = {
+            "type": "turn",
+            "turn_id": turn.turn_id,
+            "started_at": turn.started_at,
+            "wall_ms": round(wall_ms, 2),
+            **turn.attrs,
+        }
+        with self._lock:
+            self._stage_ms["turn"].append(wall_ms)
+            stages = self._open_turns.pop(turn.turn_id, {"stages": {}})["stages"]
+            self._turns.append({**record, "stages": stages})
+            self._finished[turn.turn_id] = self._turns[-1]
+            if len(self._finished) > MAX_OPEN_TURNS:
+                self._finished.pop(next(iter(self._finished)))
+        self._log(record)
+
+    def begin_turn(self, turn):
+        if self.enabled:
+            with self._lock:
+                self._open_turns[turn.turn_id] = {"stages": {}}
+                if len(self._open_turns) > MAX_OPEN_TURNS:
+                    # Drop turns whose stream was never consumed.
+                    self._open_turns.pop(next(iter(self._open_turns)))
+
+    def get_turn(self, turn_id):
+        with self._lock:
+            return self._finished.get(turn_id)
+
+    def recent_turns(self, n=20):
+        with self._lock:
+            return list(self._turns)[-n:]
+
+    def stage_percentiles(self):
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._stage_ms.items() if values}
+        return {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(values[len(values) // 2], 2),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            }
+            for stage, values in samples.items()
+        }
+
+
+_collector = Collector()
+
+
+def recent_turns(n=20):
+    return _collector.recent_turns(n)
+
+
+def get_turn(turn_id):
+    """Finished turn record (wall_ms, per-stage ms, …) for a recent turn, or None."""
+    return _collector.get_turn(turn_id)
+
+
+def stage_percentiles():
+    return _collector.stage_percentiles()
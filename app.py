@@ -1,6 +1,24 @@
 # app.py
+import os
+import sys
+
 import streamlit as st
-from agents.manager_agent import handle_query
+from agents.config import configure
+
+configure()  # load .env before any agent module reads settings
+
+from agents.manager_agent import handle_query, get_router_stats, get_speculation_stats
+from agents.session import SESSION_ID, new_session_id
+from agents.messages import Conversation, get_role_and_content
+from agents.artifact_store import get_store
+from agents.cache import get_cache
+from agents import conversation_log
+from agents import tracing
+from agents import model_policy
+from agents.gateway import get_gateway
+from agents.context import ARTIFACT_CHARS
+
+RENDER_WINDOW = int(os.getenv("RENDER_WINDOW", "20"))  # messages shown before "load older"
 
 # -------------------------------
 # 🚀 Streamlit App Setup
@@ -10,8 +28,16 @@ st.set_page_config(page_title="Startup AI Hub", page_icon="🚀", layout="wide")
 # -------------------------------
 # 💾 Initialize session memory
 # -------------------------------
+if "session_id" not in st.session_state:
+    # ?session=<id> in the URL survives reloads and restarts, so the session can be resumed.
+    requested = st.query_params.get("session")
+    st.session_state.session_id = requested if requested and SESSION_ID.fullmatch(requested) else new_session_id()
+    st.query_params["session"] = st.session_state.session_id  # keys saved artifacts and the conversation log
 if "conversation" not in st.session_state:
-    st.session_state.conversation = []
+    # Recent window, selected idea and summaries only; older turns page in on "load older".
+    conversation_log.resume(st.session_state)
+elif not isinstance(st.session_state.conversation, Conversation):
+    st.session_state.conversation = Conversation(st.session_state.conversation)
 if "ideation_history" not in st.session_state:
     st.session_state.ideation_history = []
 if "business_history" not in st.session_state:
@@ -20,6 +46,12 @@ if "selected_idea" not in st.session_state:
     st.session_state.selected_idea = None
 if "last_user_input" not in st.session_state:
     st.session_state.last_user_input = None  # prevent duplicate calls
+if "last_agent" not in st.session_state:
+    st.session_state.last_agent = None  # sticky routing for follow-ups
+if "render_limit" not in st.session_state:
+    st.session_state.render_limit = RENDER_WINDOW
+if "render_cache" not in st.session_state:
+    st.session_state.render_cache = {}  # message id -> view
 
 # -------------------------------
 # 🧠 App Header
@@ -35,6 +67,8 @@ Supports:
 """
 )
 
+stream_replies = st.sidebar.toggle("⚡ Stream responses", value=True)
+
 # -------------------------------
 # 💬 Chat Input
 # -------------------------------
@@ -43,23 +77,13 @@ user_input = st.chat_input("Ask anything about your startup idea, business model
 # Process only *new* user messages (prevents double-run)
 if user_input and user_input != st.session_state.last_user_input:
     st.session_state.last_user_input = user_input  # store to avoid re-run duplication
-    with st.spinner("🤔 Thinking..."):
-        handle_query(user_input, st.session_state)
+    new_input = user_input
+else:
+    new_input = None
 
-# -------------------------------
-# 📜 Message Display Helper
-# -------------------------------
-def get_role_and_content(msg):
-    """Unify message structure between dicts and LangChain objects."""
-    if hasattr(msg, "type") and hasattr(msg, "content"):
-        role = "user" if msg.type == "human" else "assistant"
-        content = msg.content
-    elif isinstance(msg, dict):
-        role = msg.get("role", "assistant")
-        content = msg.get("content", "")
-    else:
-        role, content = "assistant", str(msg)
-    return role, content
+if new_input and not stream_replies:
+    with st.spinner("🤔 Thinking..."):
+        handle_query(new_input, st.session_state)
 
 # -------------------------------
 # 🗨️ Chat Display (No Duplication)
@@ -67,10 +91,135 @@ def get_role_and_content(msg):
 st.divider()
 st.subheader("💬 Conversation")
 
-# Render messages only once in order
-for msg in st.session_state.conversation:
+def message_view(msg):
+    """
+    Pre-rendered (role, markdown, artifact) for a message, cached per
+    message id so reruns skip re-formatting the history. Large artifacts
+    (e.g. business models) go in a collapsed expander.
+    """
+    if msg.id in st.session_state.render_cache:
+        return st.session_state.render_cache[msg.id]
     role, content = get_role_and_content(msg)
     if role == "user":
-        st.chat_message("user").write(f"🧍‍♂️ **You:** {content}")
+        view = ("user", f"🧍‍♂️ **You:** {content}", None)
+    elif role == "assistant" and len(content) > ARTIFACT_CHARS:
+        title, _, body = content.strip().partition("\n")
+        view = ("assistant", title, body.strip())
     elif role == "assistant":
-        st.chat_message("assistant").write(content)
+        view = ("assistant", content, None)
+    else:
+        view = None  # system notes are not displayed
+    st.session_state.render_cache[msg.id] = view
+    return view
+
+
+# Only the newest messages are rendered, so rerun cost does not grow with the session.
+conversation = st.session_state.conversation
+visible = []
+index = len(conversation) - 1
+while index >= 0 and len(visible) < st.session_state.render_limit:
+    view = message_view(conversation[index])
+    if view is not None:
+        visible.append(view)
+    index -= 1
+
+if (index >= 0 or conversation.base) and st.button("⬆️ Load older messages"):
+    if index < 0:
+        conversation.load_older(RENDER_WINDOW)  # from the conversation log
+    st.session_state.render_limit += RENDER_WINDOW
+    st.rerun()
+
+with tracing.span("render", messages=len(visible)):
+    for position, (role, markdown, artifact) in enumerate(reversed(visible)):
+        with st.chat_message(role):
+            st.write(markdown)
+            if artifact is not None:
+                newest = position == len(visible) - 1
+                with st.expander(f"📄 Show full text ({len(artifact):,} chars)", expanded=newest):
+                    st.markdown(artifact)
+
+# Streamed turn: rendered below the history as tokens arrive; handle_query
+# appends it to the conversation once the stream is finished.
+if new_input and stream_replies:
+    st.chat_message("user").write(f"🧍‍♂️ **You:** {new_input}")
+    with st.chat_message("assistant"):
+        with st.spinner("🤔 Thinking..."):
+            reply_stream, _ = handle_query(new_input, st.session_state, stream=True)
+        st.write_stream(reply_stream)
+
+# -------------------------------
+# ⚡ Routing Stats (Sidebar)
+# -------------------------------
+with st.sidebar.expander("⚡ Routing stats"):
+    stats = get_router_stats()
+    st.metric("Local hit rate", f"{stats['hit_rate']:.0%}")
+    st.caption(
+        f"{stats['local_hits']} local · {stats['sticky_hits']} sticky · {stats.get('multi_hits', 0)} multi-agent · "
+        f"{stats['fallbacks']} LLM fallbacks"
+    )
+    if stats["p50_llm_routing_ms"] is not None:
+        st.caption(
+            f"p50 LLM routing: {stats['p50_llm_routing_ms']:.0f} ms · "
+            f"est. saved: {stats['estimated_saved_ms'] / 1000:.1f} s"
+        )
+    spec = get_speculation_stats()
+    if spec["launched"]:
+        st.caption(
+            f"Speculative: {spec['committed']}/{spec['launched']} committed · "
+            f"{spec['wasted_calls']} wasted · saved {spec['latency_saved_ms'] / 1000:.1f} s"
+        )
+
+with st.sidebar.expander("🗄️ Response cache"):
+    cache_stats = get_cache().stats()
+    st.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+    st.caption(
+        f"{cache_stats['memory_hits']} memory · {cache_stats['disk_hits']} disk hits · "
+        f"{cache_stats['misses']} misses · {cache_stats['disk_entries']} stored"
+    )
+    # Loaded with the legal agent; not imported here to keep cold start fast.
+    semantic_cache = sys.modules.get("agents.semantic_cache")
+    if semantic_cache is not None:
+        legal_stats = semantic_cache.get_semantic_cache().stats()
+        st.caption(
+            f"Legal answers: {legal_stats['hit_rate']:.0%} hit rate · {legal_stats['entries']} cached · "
+            f"{legal_stats['pinned']} pinned · {legal_stats['evictions']} evicted"
+        )
+
+with st.sidebar.expander("🚦 Model gateway"):
+    for model_name, gw in get_gateway().metrics().items():
+        st.caption(
+            f"**{model_name}** · queue {gw['queue_depth']} (max {gw.get('max_queue_depth', 0):.0f}) · "
+            f"{gw.get('upstream_calls', 0):.0f} calls · {gw.get('retries', 0):.0f} retries · "
+            f"{gw.get('coalesced', 0):.0f} coalesced"
+        )
+    decisions = model_policy.snapshot()["decisions"]
+    st.caption(
+        f"Tier policy: {decisions['default']} default · {decisions['lighter_tier']} lighter tier · "
+        f"{decisions['shorter_output']} shortened"
+    )
+
+with st.sidebar.expander("📚 Saved business models"):
+    saved_models = get_store().history(st.session_state.session_id, limit=10)
+    if not saved_models:
+        st.caption("No business models generated in this session yet.")
+    for saved in saved_models:
+        updated = saved["meta"].get("updated")
+        st.markdown(f"**{saved['idea']}** · v{saved['version']}" + (f" · updated {', '.join(updated)}" if updated else ""))
+
+# -------------------------------
+# 🔍 Tracing Panel (Sidebar)
+# -------------------------------
+if st.sidebar.toggle("🔍 Show traces", value=False):
+    st.sidebar.caption("Rolling p50 / p95 per stage (ms)")
+    st.sidebar.dataframe(
+        [{"stage": stage, **values} for stage, values in sorted(tracing.stage_percentiles().items())],
+        hide_index=True,
+    )
+    st.sidebar.caption("Last turns")
+    st.sidebar.dataframe(
+        [
+            {"agent": t.get("agent"), "total_ms": t["wall_ms"], **t["stages"]}
+            for t in reversed(tracing.recent_turns(10))
+        ],
+        hide_index=True,
+    )
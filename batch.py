@@ -0,0 +1,254 @@
+# batch.py
+"""
+Headless batch runner: streams a JSONL file of queries through handle_query.
+
+Each input line is a JSON object:
+    {"id": "q1", "query": "give me 3 agritech ideas", "session": "s1"}
+
+"id" defaults to the line number. Lines that share a "session" form one
+multi-turn conversation and run in file order; lines without one each get
+their own session. Sessions run in parallel on a bounded thread pool, and
+results (reply, agent, timings) stream to the output JSONL as they finish.
+Re-running with the same output file skips items that already succeeded,
+so an interrupted run resumes where it stopped.
+
+    python batch.py queries.jsonl -o results.jsonl --workers 8 --model-concurrency 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.config import configure
+
+configure()
+
+from agents import llm, tracing
+from agents.manager_agent import handle_query, update_memory
+from agents.session import SessionState
+
+
+# -------------------------------
+# 📥 INPUT / RESUME
+# -------------------------------
+def read_items(path):
+    """
+    Yield (index, item) for every non-blank line of the input JSONL. A line
+    that is not an object with a "query" string is yielded with "invalid"
+    set to the reason, so it is reported as an error instead of ending the run.
+    """
+    with open(path, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as exc:
+                item = {"invalid": f"malformed JSON: {exc}"}
+            if not isinstance(item, dict):
+                item = {"invalid": f"expected a JSON object, got {type(item).__name__}"}
+            elif "invalid" not in item and not isinstance(item.get("query"), str):
+                item["invalid"] = 'missing or non-string "query"'
+            item.setdefault("id", str(index))
+            item["id"] = str(item["id"])
+            yield index, item
+
+
+def group_sessions(items):
+    """Group items into ordered sessions: {session_key: [(index, item), ...]}."""
+    sessions = OrderedDict()
+    for index, item in items:
+        key = str(item["session"]) if item.get("session") is not None else f"__item_{item['id']}"
+        sessions.setdefault(key, []).append((index, item))
+    return sessions
+
+
+def load_completed(path):
+    """Results from a previous run that succeeded, by item id."""
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # truncated last line from an interrupted run
+            if record.get("status") == "ok":
+                completed[record["id"]] = record
+    return completed
+
+
+# -------------------------------
+# 🏃 SESSION WORKER
+# -------------------------------
+def batch_session_id(session_key):
+    """Stable session id for a batch session, so a resumed run finds its stored artifacts and ideas."""
+    return "batch-" + hashlib.sha1(session_key.encode("utf-8")).hexdigest()[:16]
+
+
+def run_session(session_key, turns, completed, emit, stop, abandon):
+    """
+    Run one session's turns in order; completed turns are replayed from
+    their results. When the session stops early, its remaining turns are
+    passed to abandon() so ordered output does not wait for them.
+    """
+    session = SessionState(batch_session_id(session_key))
+    for position, (index, item) in enumerate(turns):
+        if stop.is_set():
+            abandon([i for i, rest in turns[position:] if rest["id"] not in completed])
+            return
+        done = completed.get(item["id"])
+        if done is not None:
+            # Restore the conversation so later turns see the same context.
+            update_memory(session, item["query"], done["reply"], done["agent"])
+            session.selected_idea = done.get("selected_idea")
+            if done.get("generated_ideas") is not None:
+                session.generated_ideas = done["generated_ideas"]
+            continue
+
+        record = {"id": item["id"], "session": item.get("session"), "query": item.get("query")}
+        start = time.perf_counter()
+        try:
+            if "invalid" in item:
+                raise ValueError(item["invalid"])
+            reply, agent = handle_query(item["query"], session)
+            turn = tracing.get_turn(getattr(session, "last_turn_id", None)) or {}
+            record.update(
+                status="ok",
+                agent=agent,
+                reply=reply,
+                selected_idea=session.selected_idea,
+                generated_ideas=getattr(session, "generated_ideas", None),
+                stages_ms=turn.get("stages", {}),
+            )
+        except Exception as exc:
+            record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+        record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        emit(index, record)
+
+        if record["status"] == "error":
+            # Later turns depend on this one; resume will retry from here.
+            abandon([i for i, rest in turns[position + 1:] if rest["id"] not in completed])
+            return
+
+
+# -------------------------------
+# 📤 OUTPUT
+# -------------------------------
+class ResultWriter:
+    """Appends result lines; in ordered mode holds results back until their predecessors are written."""
+
+    def __init__(self, f, ordered, pending_indexes):
+        self.f = f
+        self.ordered = ordered
+        self.pending = sorted(pending_indexes)
+        self.next_pos = 0
+        self.buffer = {}
+        self.lock = threading.Lock()
+        self.counts = {"ok": 0, "error": 0}
+
+    def _write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.counts[record["status"]] += 1
+
+    def emit(self, index, record):
+        with self.lock:
+            if not self.ordered:
+                self._write(record)
+            else:
+                self.buffer[index] = record
+                self._write_ready()
+            self.f.flush()
+
+    def _write_ready(self):
+        while self.next_pos < len(self.pending) and self.pending[self.next_pos] in self.buffer:
+            self._write(self.buffer.pop(self.pending[self.next_pos]))
+            self.next_pos += 1
+
+    def abandon(self, indexes):
+        """Stop waiting for indexes that will not be emitted (their session stopped)."""
+        if not self.ordered or not indexes:
+            return
+        with self.lock:
+            dropped = set(indexes)
+            self.pending = [i for i in self.pending[self.next_pos:] if i not in dropped]
+            self.next_pos = 0
+            self._write_ready()
+            self.f.flush()
+
+    def drain(self):
+        """Write whatever is still buffered (e.g. after an interrupted or failed session)."""
+        with self.lock:
+            for index in sorted(self.buffer):
+                self._write(self.buffer.pop(index))
+            self.f.flush()
+
+
+def parse_model_limits(values):
+    limits = {}
+    for value in values:
+        model_name, _, limit = value.rpartition("=")
+        if not model_name:
+            raise argparse.ArgumentTypeError(f"expected MODEL=N, got {value!r}")
+        limits[model_name] = int(limit)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file for results (appended; enables resume)")
+    parser.add_argument("--workers", type=int, default=8, help="sessions processed in parallel")
+    parser.add_argument("--model-concurrency", type=int, help="max in-flight calls per model")
+    parser.add_argument("--model-limit", action="append", default=[], metavar="MODEL=N",
+                        help="per-model override, e.g. gemini-2.5-flash=2 (repeatable)")
+    parser.add_argument("--unordered", action="store_true", help="write results as they finish")
+    parser.add_argument("--no-resume", action="store_true", help="ignore results already in the output file")
+    args = parser.parse_args(argv)
+
+    if args.model_concurrency:
+        llm.set_model_concurrency(args.model_concurrency)
+    for model_name, limit in parse_model_limits(args.model_limit).items():
+        llm.set_model_concurrency(limit, model_name)
+
+    sessions = group_sessions(read_items(args.input))
+    completed = {} if args.no_resume else load_completed(args.output)
+    pending = [index for turns in sessions.values() for index, item in turns if item["id"] not in completed]
+    print(f"{len(pending)} queries to run ({len(completed)} already done) across {len(sessions)} sessions",
+          file=sys.stderr)
+
+    stop = threading.Event()
+    started = time.perf_counter()
+    with open(args.output, "w" if args.no_resume else "a", encoding="utf-8") as f:
+        writer = ResultWriter(f, ordered=not args.unordered, pending_indexes=pending)
+        pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="batch-session")
+        futures = [
+            pool.submit(run_session, key, turns, completed, writer.emit, stop, writer.abandon)
+            for key, turns in sessions.items()
+            if any(item["id"] not in completed for _, item in turns)
+        ]
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            print("Interrupted — finishing in-flight queries; re-run to resume.", file=sys.stderr)
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+        finally:
+            pool.shutdown(wait=True)
+            writer.drain()
+
+    elapsed = time.perf_counter() - started
+    print(f"{writer.counts['ok']} ok, {writer.counts['error']} errors in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if writer.counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
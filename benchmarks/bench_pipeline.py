@@ -0,0 +1,320 @@
+# benchmarks/bench_pipeline.py
+"""
+Load and regression benchmark for the full handle_query pipeline, offline.
+
+Runs N concurrent multi-turn sessions (ideation → select idea → business
+model → legal, then optional follow-ups) against the stub backend with a
+configurable model latency, in lockstep rounds (every session does turn 1,
+then turn 2, …). Reports throughput, p50/p95/p99 per turn and per traced
+stage, and memory growth per session as conversations get longer. Caches
+and stores live in a throwaway directory, so each run starts cold.
+
+    python benchmarks/bench_pipeline.py run --sessions 50 --latency-ms 50 -o bench.json
+    python benchmarks/bench_pipeline.py run --mode async --sessions 200 --turns 12
+    python benchmarks/bench_pipeline.py compare baseline.json bench.json --threshold 0.15
+
+compare exits with status 1 when a metric regressed by more than the
+threshold (and by more than --min-ms for latencies).
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PERCENTILES = (50, 95, 99)
+
+SCRIPT = [
+    "give me 3 startup ideas in {domain} (cohort {n})",
+    "I choose option 2",
+    "give me the business model",
+    "what are the legal risks for my idea?",
+]
+FOLLOW_UPS = [
+    "how should I price it for the first {k}00 customers?",
+    "do I need an NDA with contractor number {k}?",
+    "what revenue streams could we add in year {k}?",
+    "what GDPR steps apply when we reach {k}0k users?",
+]
+DOMAINS = ["fintech", "agritech", "edtech", "healthtech", "climate", "logistics"]
+
+
+def session_script(n, turns):
+    """Queries for session n: the core journey, then follow-ups up to turns."""
+    queries = [q.format(domain=DOMAINS[n % len(DOMAINS)], n=n) for q in SCRIPT]
+    k = 1
+    while len(queries) < turns:
+        queries.append(FOLLOW_UPS[(k - 1) % len(FOLLOW_UPS)].format(k=k))
+        k += 1
+    return queries[:turns]
+
+
+# -------------------------------
+# 🧪 ENVIRONMENT
+# -------------------------------
+def isolate(workdir, rate_limits):
+    """Point every store and cache at workdir; must run before agents are imported."""
+    os.environ.update(
+        LLM_BACKEND="stub",
+        TRACING="1",
+        TRACE_PATH=os.path.join(workdir, "spans.jsonl"),
+        ARTIFACT_STORE_PATH=os.path.join(workdir, "artifacts.sqlite3"),
+        RESPONSE_CACHE_PATH=os.path.join(workdir, "responses.sqlite3"),
+        IDEA_REGISTRY_PATH=os.path.join(workdir, "ideas.sqlite3"),
+        SEMANTIC_CACHE_PATH=os.path.join(workdir, "semantic.sqlite3"),
+    )
+    if not rate_limits:
+        for name in ("GATEWAY_FLASH_RPS", "GATEWAY_LITE_RPS", "GATEWAY_FLASH_BURST", "GATEWAY_LITE_BURST"):
+            os.environ[name] = "1000000"
+
+
+def make_backend(latency_ms, tokens_per_second):
+    """Stub whose ideas are unique per cohort, so sessions do not share cached artifacts."""
+    from agents import llm
+
+    def ideas(prompt):
+        match = re.search(r"cohort (\d+)", prompt)
+        tag = match.group(1) if match else "0"
+        return re.sub(r"\*\*(\w+)\*\*", lambda m: f"**{m.group(1)}{tag}**", llm.STUB_IDEAS)
+
+    rules = [(pattern, ideas if reply == llm.STUB_IDEAS else reply) for pattern, reply in llm.DEFAULT_STUB_RULES]
+    return llm.StubBackend(latency_ms=latency_ms, tokens_per_second=tokens_per_second, rules=rules)
+
+
+# -------------------------------
+# 🏃 RUNNER
+# -------------------------------
+def percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    result = {f"p{p}_ms": round(values[min(len(values) - 1, int(len(values) * p / 100))], 3) for p in PERCENTILES}
+    result["mean_ms"] = round(sum(values) / len(values), 3)
+    result["count"] = len(values)
+    return result
+
+
+def run_rounds(mode, scripts, on_round=None):
+    """Run every session's turns in lockstep; returns (turn records, elapsed_s, sessions)."""
+    from agents import tracing
+    from agents.manager_agent import handle_query, handle_query_async
+    from agents.session import SessionState
+
+    sessions = [SessionState() for _ in scripts]
+    records = []
+
+    def record(session, index, agent, elapsed_ms):
+        turn = tracing.get_turn(session.last_turn_id) or {}
+        records.append({"turn": index, "agent": agent, "wall_ms": elapsed_ms, "stages": turn.get("stages", {})})
+
+    def run_turn(session, index, query):
+        start = time.perf_counter()
+        _, agent = handle_query(query, session)
+        record(session, index, agent, (time.perf_counter() - start) * 1000)
+
+    async def run_turn_async(session, index, query):
+        start = time.perf_counter()
+        _, agent = await handle_query_async(query, session)
+        record(session, index, agent, (time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    if mode == "async":
+        import asyncio
+
+        async def main():
+            for index in range(len(scripts[0])):
+                await asyncio.gather(*(
+                    run_turn_async(session, index, script[index]) for session, script in zip(sessions, scripts)
+                ))
+                if on_round:
+                    on_round(index)
+
+        asyncio.run(main())
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(scripts), thread_name_prefix="bench-session") as pool:
+            for index in range(len(scripts[0])):
+                list(pool.map(run_turn, sessions, [index] * len(sessions), [s[index] for s in scripts]))
+                if on_round:
+                    on_round(index)
+    return records, time.perf_counter() - started, sessions
+
+
+def summarize(records, elapsed_s):
+    stages = {}
+    for rec in records:
+        for stage, ms in rec["stages"].items():
+            stages.setdefault(stage, []).append(ms)
+    by_turn = {}
+    for rec in records:
+        by_turn.setdefault(rec["turn"], []).append(rec["wall_ms"])
+    return {
+        "turns": len(records),
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_turns_per_s": round(len(records) / elapsed_s, 2) if elapsed_s else None,
+        "turn": percentiles([rec["wall_ms"] for rec in records]),
+        "by_turn": {str(index + 1): percentiles(values) for index, values in sorted(by_turn.items())},
+        "stages": {stage: percentiles(values) for stage, values in sorted(stages.items())},
+    }
+
+
+def measure_memory(mode, scripts):
+    """Traced heap growth per session after each round (tracemalloc slows the run, so it is a separate pass)."""
+    growth = []
+    tracemalloc.start()
+    gc.collect()
+    base = tracemalloc.get_traced_memory()[0]
+
+    def on_round(index):
+        gc.collect()
+        growth.append(round((tracemalloc.get_traced_memory()[0] - base) / len(scripts) / 1024, 2))
+
+    try:
+        run_rounds(mode, scripts, on_round)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "per_session_kb_by_turn": {str(index + 1): kb for index, kb in enumerate(growth)},
+        "per_turn_kb": round((growth[-1] - growth[0]) / (len(growth) - 1), 2) if len(growth) > 1 else None,
+        "peak_kb": round((peak - base) / 1024, 2),
+    }
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    isolate(workdir, args.rate_limits)
+
+    from agents import llm
+
+    llm.set_backend(make_backend(args.latency_ms, args.tokens_per_second))
+
+    scripts = [session_script(n, args.turns) for n in range(args.sessions)]
+    if args.warmup:
+        run_rounds(args.mode, [session_script(10 ** 6, args.turns)])  # imports, SQLite schemas, router model
+    records, elapsed_s, _ = run_rounds(args.mode, scripts)
+    results = {
+        "meta": {
+            "mode": args.mode,
+            "sessions": args.sessions,
+            "turns_per_session": args.turns,
+            "latency_ms": args.latency_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "rate_limits": args.rate_limits,
+            "python": platform.python_version(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        **summarize(records, elapsed_s),
+    }
+    if not args.no_memory:
+        # Fresh cohorts so the memory pass is as cold as the timed one.
+        offset = args.sessions + 1
+        results["memory"] = measure_memory(args.mode, [session_script(offset + n, args.turns) for n in range(args.sessions)])
+    return results
+
+
+# -------------------------------
+# 📊 REPORT / COMPARE
+# -------------------------------
+def print_report(results):
+    meta = results["meta"]
+    print(f"{meta['sessions']} sessions × {meta['turns_per_session']} turns ({meta['mode']}, "
+          f"stub latency {meta['latency_ms']} ms): {results['turns']} turns in {results['elapsed_s']} s "
+          f"= {results['throughput_turns_per_s']} turns/s")
+    print(f"\n{'stage':<28}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, stats in [("turn", results["turn"])] + list(results["stages"].items()):
+        print(f"{stage:<28}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    memory = results.get("memory")
+    if memory:
+        curve = " → ".join(f"{kb:.0f}" for kb in memory["per_session_kb_by_turn"].values())
+        print(f"\nHeap per session by turn (KiB): {curve}  (≈{memory['per_turn_kb']} KiB/turn)")
+
+
+def compare(baseline, current, threshold, min_ms):
+    """List of (metric, baseline, current, change) that got worse by more than threshold."""
+    regressions = []
+
+    def check(metric, old, new, higher_is_worse=True, floor=0.0):
+        if old in (None, 0) or new is None:
+            return
+        change = (new - old) / old if higher_is_worse else (old - new) / old
+        if change > threshold and abs(new - old) > floor:
+            regressions.append((metric, old, new, change))
+
+    check("throughput_turns_per_s", baseline.get("throughput_turns_per_s"), current.get("throughput_turns_per_s"),
+          higher_is_worse=False)
+    pairs = [("turn", baseline.get("turn", {}), current.get("turn", {}))]
+    pairs += [(f"stage {stage}", stats, current.get("stages", {}).get(stage, {}))
+              for stage, stats in baseline.get("stages", {}).items()]
+    for name, old, new in pairs:
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            check(f"{name} {key}", old.get(key), new.get(key), floor=min_ms)
+    old_memory, new_memory = baseline.get("memory") or {}, current.get("memory") or {}
+    check("memory per_turn_kb", old_memory.get("per_turn_kb"), new_memory.get("per_turn_kb"), floor=1.0)
+    check("memory peak_kb", old_memory.get("peak_kb"), new_memory.get("peak_kb"), floor=64.0)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions")
+    run_parser.add_argument("--turns", type=int, default=len(SCRIPT), help="turns per session (≥4 adds follow-ups)")
+    run_parser.add_argument("--latency-ms", type=float, default=50.0, help="stub time to first token")
+    run_parser.add_argument("--tokens-per-second", type=float, default=0.0, help="stub output rate (0 = instant)")
+    run_parser.add_argument("--mode", choices=("threads", "async"), default="threads")
+    run_parser.add_argument("--rate-limits", action="store_true", help="keep the gateway's real rate limits")
+    run_parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    run_parser.add_argument("--no-warmup", dest="warmup", action="store_false")
+    run_parser.add_argument("-o", "--output", help="write results JSON here")
+    run_parser.add_argument("--baseline", help="compare against this results JSON after running")
+    run_parser.add_argument("--threshold", type=float, default=0.15)
+    run_parser.add_argument("--min-ms", type=float, default=2.0)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown")
+    compare_parser.add_argument("--min-ms", type=float, default=2.0, help="ignore latency changes below this")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run(args)
+        print_report(current)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+
+    regressions = compare(baseline, current, args.threshold, args.min_ms)
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+        return 0
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for metric, old, new, change in regressions:
+        print(f"  {metric:<40}{old:>12}{new:>12}  ({change:+.0%} worse)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# benchmarks/import_time.py
+"""
+Cold-start benchmark driven by `python -X importtime`.
+
+Compares importing the manager alone (what a Streamlit worker pays at
+start-up now that agents and SDKs load lazily) with importing the manager
+plus every agent and the Gemini/LangChain SDKs (what each worker paid when
+everything was imported eagerly).
+
+    python benchmarks/import_time.py [--repeat 5] [--top 10] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "lazy (import manager)": "import agents.manager_agent",
+    "eager (manager + agents + SDKs)": (
+        "import agents.manager_agent as m\n"
+        "for name in m.AGENT_REGISTRY: m.get_agent(name)\n"
+        "import google.generativeai, langchain_google_genai.chat_models, langchain.schema"
+    ),
+}
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(code):
+    """Run code in a fresh interpreter; return (total_us, {top-level module: cumulative_us})."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    top_level = {}
+    for match in LINE.finditer(proc.stderr):
+        _, cumulative, indent, module = match.groups()
+        if len(indent) <= 1:
+            top_level[module] = top_level.get(module, 0) + int(cumulative)
+    return sum(top_level.values()), top_level
+
+
+def run(repeat, top):
+    results = {}
+    for label, code in SCENARIOS.items():
+        try:
+            runs = [measure(code) for _ in range(repeat)]
+        except RuntimeError as exc:
+            results[label] = {"error": str(exc)}
+            continue
+        totals = [total for total, _ in runs]
+        slowest = sorted(runs[-1][1].items(), key=lambda kv: kv[1], reverse=True)[:top]
+        results[label] = {
+            "median_ms": statistics.median(totals) / 1000,
+            "min_ms": min(totals) / 1000,
+            "top_modules_ms": {name: us / 1000 for name, us in slowest},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.top)
+    for label, result in results.items():
+        print(f"\n{label}")
+        if "error" in result:
+            print(f"  unavailable: {result['error']}")
+            continue
+        print(f"  median {result['median_ms']:.1f} ms (min {result['min_ms']:.1f} ms)")
+        for name, ms in result["top_modules_ms"].items():
+            print(f"    {ms:8.1f} ms  {name}")
+
+    lazy, eager = (results[label].get("median_ms") for label in SCENARIOS)
+    if lazy and eager:
+        print(f"\nCold-start reduction: {eager - lazy:.1f} ms ({1 - lazy / eager:.0%})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
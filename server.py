@@ -0,0 +1,186 @@
+# server.py
+"""
+Minimal asyncio HTTP endpoint for handle_query_async — no web framework.
+
+    POST /chat              {"message": "...", "session_id": "optional"}
+                            -> {"session_id", "agent", "reply", "selected_idea"}
+    GET  /sessions/<id>     -> {"session_id", "selected_idea", "conversation"}
+    GET  /health            -> {"status": "ok"}
+
+Omit session_id to start a new conversation; send the returned id with the
+next message to continue it. All conversations share one event loop, so a
+turn waiting on the model does not hold a thread. Turns within a session
+run one at a time. Sessions are kept in memory by default; --durable keeps
+them in the conversation logs so they survive restarts, and serve() takes
+any other SessionStore.
+
+    python server.py --host 127.0.0.1 --port 8080 [--durable]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import weakref
+
+from agents.config import configure
+
+configure()
+
+from agents.manager_agent import handle_query_async
+from agents.conversation_log import LogSessionStore
+from agents.session import SESSION_ID, MemorySessionStore, SessionState, new_session_id
+
+MAX_BODY_BYTES = 64 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------------------
+# 🧩 ROUTES
+# -------------------------------
+class ChatService:
+    """Request handling, independent of the HTTP plumbing below."""
+
+    def __init__(self, store=None):
+        self.store = store or MemorySessionStore()
+        self._locks = weakref.WeakValueDictionary()  # session_id -> asyncio.Lock
+
+    def _lock(self, session_id):
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def chat(self, payload):
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, '"message" must be a non-empty string')
+        session_id = str(payload.get("session_id") or new_session_id())
+        if not SESSION_ID.fullmatch(session_id):
+            raise HTTPError(400, '"session_id" may only contain letters, digits, "-" and "_"')
+
+        async with self._lock(session_id):
+            session_state = await self.store.load(session_id) or SessionState(session_id)
+            reply, agent = await handle_query_async(message, session_state)
+            await self.store.save(session_state)
+        return {"session_id": session_id, "agent": agent, "reply": reply, "selected_idea": session_state.selected_idea}
+
+    async def session(self, session_id):
+        session_state = await self.store.load(session_id)
+        if session_state is None:
+            raise HTTPError(404, f"unknown session {session_id!r}")
+        return {
+            "session_id": session_id,
+            "selected_idea": session_state.selected_idea,
+            "conversation": session_state.conversation.to_dicts(),
+        }
+
+    async def handle(self, method, path, body):
+        """Return the JSON-able response for one request; raises HTTPError."""
+        if path == "/health":
+            return {"status": "ok"}
+        if path == "/chat":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "body must be JSON") from None
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "body must be a JSON object")
+            return await self.chat(payload)
+        if path.startswith("/sessions/") and method == "GET":
+            return await self.session(path[len("/sessions/"):])
+        raise HTTPError(404, f"no route for {method} {path}")
+
+
+# -------------------------------
+# 🌐 HTTP
+# -------------------------------
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length") or "0"
+    if not (length.isascii() and length.isdigit()):
+        raise HTTPError(400, "invalid Content-Length")
+    length = int(length)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], body
+
+
+def write_response(writer, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode("latin-1") + body
+    )
+
+
+async def serve(host="127.0.0.1", port=8080, store=None):
+    """Start the server; returns the asyncio.Server (use as an async context manager)."""
+    service = ChatService(store)
+
+    async def on_connection(reader, writer):
+        try:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    return
+                status, payload = 200, await service.handle(*request)
+            except HTTPError as exc:
+                status, payload = exc.status, {"error": str(exc)}
+            except Exception as exc:
+                status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+            write_response(writer, status, payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(on_connection, host, port)
+
+
+async def main_async(args):
+    server = await serve(args.host, args.port, LogSessionStore() if args.durable else None)
+    print(f"Listening on http://{args.host}:{args.port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--durable", action="store_true", help="persist sessions to the conversation logs")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import pytest
+
+from agents.semantic_cache import SemanticCache, key_terms
+
+CACHED = [
+    "how do I trademark my startup name in the US",
+    "do I need to comply with GDPR for my app",
+    "do I need an NDA before pitching investors",
+]
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(":memory:")
+    for question in CACHED:
+        cache.add(question, f"answer: {question}", "legal")
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    "how do I trademark my startup name in the EU",
+    "do I need to comply with CCPA for my app",
+    "do I need to comply with HIPAA for my app",
+])
+def test_other_jurisdiction_or_regulation_misses(cache, question):
+    assert cache.lookup(question, "legal") is None
+
+
+@pytest.mark.parametrize("question, cached", [
+    ("how can I trademark the name of my startup in the US", CACHED[0]),
+    ("should I get an NDA signed before pitching to investors", CACHED[2]),
+])
+def test_paraphrase_hits(cache, question, cached):
+    hit = cache.lookup(question, "legal")
+    assert hit is not None and hit["question"] == cached
+
+
+def test_key_terms():
+    assert key_terms("trademark in the United States") == key_terms("trademark in the U.S.") == {"us"}
+    assert key_terms("can you help us") == set()
+    assert key_terms("GDPR article 17 in Europe") == {"gdpr", "article 17", "eu"}
+
+
+def test_all_pinned_cache_grows_past_capacity():
+    cache = SemanticCache(":memory:", max_entries=2)
+    for i in range(6):
+        cache.add(f"question {i} about trademark renewals", "answer", "legal", pinned=True)
+    assert cache.stats()["entries"] == 6
+    assert cache.lookup("question 5 about trademark renewals", "legal") is not None